@@ -0,0 +1,257 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+ZODIAC_SIGNS = (
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces",
+)
+
+# (month, day) on which each tropical sun sign starts, in calendar order
+_SUN_SIGN_STARTS = (
+    ((1, 20), "Aquarius"), ((2, 19), "Pisces"), ((3, 21), "Aries"), ((4, 20), "Taurus"),
+    ((5, 21), "Gemini"), ((6, 21), "Cancer"), ((7, 23), "Leo"), ((8, 23), "Virgo"),
+    ((9, 23), "Libra"), ((10, 23), "Scorpio"), ((11, 22), "Sagittarius"), ((12, 22), "Capricorn"),
+)
+
+
+def sun_sign(birthdate: date) -> str:
+    """Tropical sun sign for a birth date, using the conventional date ranges."""
+    sign = "Capricorn"
+    for start, name in _SUN_SIGN_STARTS:
+        if (birthdate.month, birthdate.day) >= start:
+            sign = name
+    return sign
+
+
+# Keplerian elements and rates per Julian century for J2000, valid 1800-2050
+# (Standish, "Approximate Positions of the Planets", JPL, table 1):
+# a, e, I, L, longitude of perihelion, longitude of ascending node
+_ELEMENTS = np.array([
+    # Mercury
+    [0.38709927, 0.20563593, 7.00497902, 252.25032350, 77.45779628, 48.33076593],
+    # Venus
+    [0.72333566, 0.00677672, 3.39467605, 181.97909950, 131.60246718, 76.67984255],
+    # Earth-Moon barycenter
+    [1.00000261, 0.01671123, -0.00001531, 100.46457166, 102.93768193, 0.0],
+    # Mars
+    [1.52371034, 0.09339410, 1.84969142, -4.55343205, -23.94362959, 49.55953891],
+    # Jupiter
+    [5.20288700, 0.04838624, 1.30439695, 34.39644051, 14.72847983, 100.47390909],
+    # Saturn
+    [9.53667594, 0.05386179, 2.48599187, 49.95424423, 92.59887831, 113.66242448],
+    # Uranus
+    [19.18916464, 0.04725744, 0.77263783, 313.23810451, 170.95427630, 74.01692503],
+    # Neptune
+    [30.06992276, 0.00859048, 1.77004347, -55.12002969, 44.96476227, 131.78422574],
+])
+_RATES = np.array([
+    [0.00000037, 0.00001906, -0.00594749, 149472.67411175, 0.16047689, -0.12534081],
+    [0.00000390, -0.00004107, -0.00078890, 58517.81538729, 0.00268329, -0.27769418],
+    [0.00000562, -0.00004392, -0.01294668, 35999.37244981, 0.32327364, 0.0],
+    [0.00001847, 0.00007882, -0.00813131, 19140.30268499, 0.44441088, -0.29257343],
+    [-0.00011607, -0.00013253, -0.00183714, 3034.74612775, 0.21252668, 0.20469106],
+    [-0.00125060, -0.00050991, 0.00193609, 1222.49362201, -0.41897216, -0.28867794],
+    [-0.00196176, -0.00004397, -0.00242939, 428.48202785, 0.40805281, 0.04240589],
+    [0.00026291, 0.00005105, 0.00035372, 218.45945325, -0.32241464, -0.00508664],
+])
+_EARTH = 2
+_PLANET_ROWS = (0, 1, 3, 4, 5, 6, 7)
+
+BODIES = ("Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter", "Saturn", "Uranus", "Neptune")
+
+# General precession in longitude, degrees per Julian century (J2000 -> of date)
+_PRECESSION = 1.3969713
+
+_J2000 = 2451545.0
+_UNIX_EPOCH_JD = 2440587.5
+
+
+def julian_day(moments_utc: np.ndarray) -> np.ndarray:
+    """Julian day numbers for an array of numpy datetime64 values in UT."""
+    seconds = (moments_utc - np.datetime64("1970-01-01T00:00:00")) / np.timedelta64(1, "s")
+    return seconds / 86400.0 + _UNIX_EPOCH_JD
+
+
+def _heliocentric(T: np.ndarray) -> np.ndarray:
+    """Heliocentric ecliptic J2000 coordinates, shape (3, planets, n)."""
+    elements = _ELEMENTS[:, :, None] + _RATES[:, :, None] * T[None, None, :]
+    a, e, inclination, mean_longitude, perihelion, node = (elements[:, i] for i in range(6))
+    inclination, node = np.radians(inclination), np.radians(node)
+    argument = np.radians(perihelion) - node
+    mean_anomaly = np.radians((mean_longitude - perihelion + 180.0) % 360.0 - 180.0)
+
+    # Kepler's equation by Newton iteration; converges in a few steps for e < 0.21
+    eccentric = mean_anomaly + e * np.sin(mean_anomaly)
+    for _ in range(5):
+        eccentric -= (eccentric - e * np.sin(eccentric) - mean_anomaly) / (1 - e * np.cos(eccentric))
+
+    x_orbit = a * (np.cos(eccentric) - e)
+    y_orbit = a * np.sqrt(1 - e * e) * np.sin(eccentric)
+
+    cos_w, sin_w = np.cos(argument), np.sin(argument)
+    cos_n, sin_n = np.cos(node), np.sin(node)
+    cos_i, sin_i = np.cos(inclination), np.sin(inclination)
+    x = (cos_w * cos_n - sin_w * sin_n * cos_i) * x_orbit + (-sin_w * cos_n - cos_w * sin_n * cos_i) * y_orbit
+    y = (cos_w * sin_n + sin_w * cos_n * cos_i) * x_orbit + (-sin_w * sin_n + cos_w * cos_n * cos_i) * y_orbit
+    z = (sin_w * sin_i) * x_orbit + (cos_w * sin_i) * y_orbit
+    return np.stack([x, y, z])
+
+
+def _moon_longitude(T: np.ndarray) -> np.ndarray:
+    """Geocentric lunar longitude of date (Meeus, main periodic terms, ~0.3 deg)."""
+    L = 218.3164477 + 481267.88123421 * T
+    D = np.radians(297.8501921 + 445267.1114034 * T)
+    M = np.radians(357.5291092 + 35999.0502909 * T)
+    Mp = np.radians(134.9633964 + 477198.8675055 * T)
+    F = np.radians(93.2720950 + 483202.0175233 * T)
+    return (
+        L
+        + 6.288774 * np.sin(Mp)
+        + 1.274027 * np.sin(2 * D - Mp)
+        + 0.658314 * np.sin(2 * D)
+        + 0.213618 * np.sin(2 * Mp)
+        - 0.185116 * np.sin(M)
+        - 0.114332 * np.sin(2 * F)
+        + 0.058793 * np.sin(2 * D - 2 * Mp)
+        + 0.057066 * np.sin(2 * D - M - Mp)
+        + 0.053322 * np.sin(2 * D + Mp)
+        + 0.045758 * np.sin(2 * D - M)
+        - 0.040923 * np.sin(M - Mp)
+        - 0.034720 * np.sin(D)
+        - 0.030383 * np.sin(M + Mp)
+    ) % 360.0
+
+
+def ascendant(jd_ut: np.ndarray, latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """Ecliptic longitude of the ascendant in degrees (longitude east-positive)."""
+    d = jd_ut - _J2000
+    T = d / 36525.0
+    sidereal = np.radians((280.46061837 + 360.98564736629 * d + 0.000387933 * T * T + longitude) % 360.0)
+    obliquity = np.radians(23.4392911 - 0.0130042 * T)
+    latitude = np.radians(latitude)
+    asc = np.arctan2(
+        np.cos(sidereal),
+        -(np.sin(sidereal) * np.cos(obliquity) + np.tan(latitude) * np.sin(obliquity))
+    )
+    return np.degrees(asc) % 360.0
+
+
+def body_longitudes(jd_ut: np.ndarray) -> np.ndarray:
+    """
+    Geocentric tropical ecliptic longitudes of date, in degrees.
+
+    Returns an array of shape (len(BODIES), n) for n Julian days, so
+    thousands of charts are computed in one pass.
+    """
+    jd_ut = np.atleast_1d(np.asarray(jd_ut, dtype=float))
+    T = (jd_ut - _J2000) / 36525.0
+    helio = _heliocentric(T)
+    geo = helio[:, _PLANET_ROWS, :] - helio[:, _EARTH, :][:, None, :]
+    planets = np.degrees(np.arctan2(geo[1], geo[0]))
+    sun = np.degrees(np.arctan2(-helio[1, _EARTH], -helio[0, _EARTH]))
+    precession = _PRECESSION * T
+    longitudes = np.empty((len(BODIES), jd_ut.size))
+    longitudes[0] = sun + precession
+    longitudes[1] = _moon_longitude(T)
+    longitudes[2:] = planets + precession
+    return longitudes % 360.0
+
+
+def sign_of(longitude: float) -> str:
+    return ZODIAC_SIGNS[int(longitude // 30) % 12]
+
+
+def parse_birthtime(birthtime: Optional[str]) -> Optional[Tuple[int, int]]:
+    """(hour, minute) from the stored birth time, or None if it can't be read."""
+    if not birthtime:
+        return None
+    for fmt in ("%I:%M %p", "%H:%M %p", "%H:%M"):
+        try:
+            parsed = datetime.strptime(birthtime.strip().upper(), fmt)
+            return parsed.hour, parsed.minute
+        except ValueError:
+            continue
+    return None
+
+
+def natal_chart(
+    birthdate: date,
+    birthtime: Optional[str] = None,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    utc_offset_hours: float = 0.0,
+) -> Dict:
+    """
+    Natal chart from birth data.
+
+    Without a readable birth time the chart is cast for local noon, and
+    without coordinates there is no ascendant or houses.
+    """
+    time_of_day = parse_birthtime(birthtime)
+    hour, minute = time_of_day if time_of_day else (12, 0)
+    moment = datetime.combine(birthdate, datetime.min.time()) + timedelta(
+        hours=hour - utc_offset_hours, minutes=minute
+    )
+    jd = julian_day(np.array([moment], dtype="datetime64[s]"))
+    longitudes = body_longitudes(jd)[:, 0]
+
+    asc = None
+    if time_of_day and latitude is not None and longitude is not None:
+        asc = float(ascendant(jd, np.array([latitude]), np.array([longitude]))[0])
+
+    planets = {}
+    for name, value in zip(BODIES, longitudes):
+        planet = {"longitude": round(float(value), 2), "sign": sign_of(value)}
+        if asc is not None:
+            # Whole-sign houses counted from the ascendant's sign
+            planet["house"] = (int(value // 30) - int(asc // 30)) % 12 + 1
+        planets[name] = planet
+
+    return {
+        "sun_sign": planets["Sun"]["sign"],
+        "moon_sign": planets["Moon"]["sign"],
+        "ascendant_sign": sign_of(asc) if asc is not None else None,
+        "ascendant": round(asc, 2) if asc is not None else None,
+        "birth_time_known": time_of_day is not None,
+        "planets": planets,
+    }
+
+
+def current_positions(moment: datetime) -> Dict[str, Dict]:
+    """Positions of the bodies at a UT moment (for transits)."""
+    longitudes = body_longitudes(julian_day(np.array([moment], dtype="datetime64[s]")))[:, 0]
+    return {
+        name: {"longitude": round(float(value), 2), "sign": sign_of(value)}
+        for name, value in zip(BODIES, longitudes)
+    }
+
+
+def _format_position(position: Dict) -> str:
+    text = f"{position['sign']} {position['longitude'] % 30:.1f}°"
+    if "house" in position:
+        text += f", house {position['house']}"
+    return text
+
+
+def chart_facts(chart: Dict, transits: Optional[Dict[str, Dict]] = None) -> str:
+    """Render a chart (and optionally today's transits) as prompt facts."""
+    lines = [
+        f"* Sun Sign: {chart['sun_sign']}",
+        f"* Moon Sign: {chart['moon_sign']}",
+        f"* Ascendant: {chart['ascendant_sign'] or 'Unknown (birth time or location missing)'}",
+        "* Natal Positions: " + "; ".join(
+            f"{name} {_format_position(position)}" for name, position in chart["planets"].items()
+        ),
+    ]
+    location = chart.get("location")
+    if location:
+        lines.append(
+            f"* Birth Place: {location['name']} ({location['latitude']:.2f}, {location['longitude']:.2f}), "
+            f"UTC{location['utc_offset_hours']:+g}h"
+        )
+    if transits:
+        lines.append("* Current Positions: " + "; ".join(
+            f"{name} {_format_position(position)}" for name, position in transits.items()
+        ))
+    return "\n".join(lines)
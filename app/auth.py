@@ -1,13 +1,33 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from .config import settings
+from .metrics import Counter, Gauge
 from .models.user import TokenData
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt releases the GIL, so a thread pool spreads hashing across cores
+# without blocking the event loop.
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash"
+)
+
+password_queue_depth = Gauge("password_hash_queued", "Password hash operations waiting for a worker")
+password_in_flight = Gauge("password_hash_in_flight", "Password hash operations running on a worker")
+password_wait_seconds = Counter(
+    "password_hash_wait_seconds_total", "Time password operations spent queued", ("operation",)
+)
+password_operations = Counter(
+    "password_hash_operations_total", "Completed password hash operations", ("operation",)
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
@@ -19,6 +39,39 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_in_password_pool(operation: str, func, *args):
+    """Run a password function on the bounded worker pool and record queueing."""
+    queued_at = time.perf_counter()
+    password_queue_depth.inc()
+
+    def task():
+        password_queue_depth.dec()
+        password_wait_seconds.inc(time.perf_counter() - queued_at, operation=operation)
+        password_in_flight.inc()
+        try:
+            return func(*args)
+        finally:
+            password_in_flight.dec()
+            password_operations.inc(operation=operation)
+
+    return await asyncio.get_running_loop().run_in_executor(password_executor, task)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password worker pool."""
+    return await _run_in_password_pool("verify", verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password worker pool."""
+    return await _run_in_password_pool("hash", get_password_hash, password)
+
+
+def shutdown_password_pool():
+    """Stop the password worker pool."""
+    password_executor.shutdown(wait=False, cancel_futures=True)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
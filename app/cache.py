@@ -0,0 +1,297 @@
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from .config import settings
+from .metrics import Counter
+from .models.user import UserInDB
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Redis is optional; the in-process backend is the default
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire after a TTL."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+user_cache_hits = Counter("user_cache_hits_total", "Authenticated user lookups served from cache")
+user_cache_misses = Counter("user_cache_misses_total", "Authenticated user lookups that went to MongoDB")
+user_cache_invalidations = Counter("user_cache_invalidations_total", "Explicit user cache invalidations")
+user_cache_stale_writes = Counter(
+    "user_cache_stale_writes_total", "User cache writes dropped because the user was invalidated meanwhile"
+)
+
+# How long an invalidation is remembered; far longer than any user lookup takes
+GENERATION_TTL_SECONDS = 86400
+
+
+class MemoryUserCacheBackend:
+    """Per-process user cache."""
+
+    def __init__(self):
+        self.cache = TTLCache(settings.user_cache_max_size, settings.user_cache_ttl_seconds)
+        self.generations = TTLCache(settings.user_cache_max_size, GENERATION_TTL_SECONDS)
+        self._counter = itertools.count(1)
+
+    async def get(self, subject: str) -> Optional[UserInDB]:
+        return self.cache.get(subject)
+
+    async def generation(self, subject: str) -> int:
+        return self.generations.get(subject) or 0
+
+    async def set(self, subject: str, user: UserInDB, generation: int) -> bool:
+        if (self.generations.get(subject) or 0) != generation:
+            return False
+        self.cache.set(subject, user)
+        return True
+
+    async def delete(self, subject: str):
+        self.cache.delete(subject)
+        self.generations.set(subject, next(self._counter))
+
+    async def close(self):
+        self.cache.clear()
+        self.generations.clear()
+
+
+# Store the user only if its generation is still the one read before loading it
+SET_IF_GENERATION_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+class RedisUserCacheBackend:
+    """User cache shared by every worker through Redis."""
+
+    prefix = "user:"
+    generation_prefix = "user-generation:"
+
+    def __init__(self):
+        if redis is None:
+            raise RuntimeError("USER_CACHE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.from_url(settings.redis_url)
+        self.set_if_generation = self.client.register_script(SET_IF_GENERATION_SCRIPT)
+
+    async def get(self, subject: str) -> Optional[UserInDB]:
+        data = await self.client.get(self.prefix + subject)
+        if data is None:
+            return None
+        return UserInDB.model_validate_json(data)
+
+    async def generation(self, subject: str) -> int:
+        return int(await self.client.get(self.generation_prefix + subject) or 0)
+
+    async def set(self, subject: str, user: UserInDB, generation: int) -> bool:
+        stored = await self.set_if_generation(
+            keys=[self.prefix + subject, self.generation_prefix + subject],
+            args=[str(generation), user.model_dump_json(by_alias=True), settings.user_cache_ttl_seconds],
+        )
+        return bool(stored)
+
+    async def delete(self, subject: str):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(self.prefix + subject)
+            pipe.incr(self.generation_prefix + subject)
+            pipe.expire(self.generation_prefix + subject, GENERATION_TTL_SECONDS)
+            await pipe.execute()
+
+    async def close(self):
+        await self.client.aclose()
+
+
+USER_CACHE_BACKENDS = {
+    "memory": MemoryUserCacheBackend,
+    "redis": RedisUserCacheBackend,
+}
+
+
+class UserCache:
+    """
+    Cache of authenticated users keyed by token subject (email).
+
+    A lookup that misses reads the subject's generation before loading the
+    user from MongoDB and passes it to set(). invalidate() bumps the
+    generation, so a lookup that loaded the user before an update or delete
+    can't write the stale copy back afterwards.
+
+    A backend outage degrades to cache misses: lookups fall back to MongoDB
+    instead of failing every authenticated request.
+    """
+
+    backend = None
+
+    async def get(self, subject: str) -> Optional[UserInDB]:
+        if self.backend is None:
+            return None
+        try:
+            user = await self.backend.get(subject)
+        except Exception as e:
+            logger.warning("User cache read failed, loading from the database: %s", e)
+            user = None
+        if user is None:
+            user_cache_misses.inc()
+        else:
+            user_cache_hits.inc()
+        return user
+
+    async def generation(self, subject: str) -> Optional[int]:
+        """The subject's generation, or None when it can't be read (set() then skips)."""
+        if self.backend is None:
+            return 0
+        try:
+            return await self.backend.generation(subject)
+        except Exception as e:
+            logger.warning("User cache generation read failed: %s", e)
+            return None
+
+    async def set(self, subject: str, user: UserInDB, generation: Optional[int]):
+        if self.backend is None or generation is None:
+            return
+        try:
+            stored = await self.backend.set(subject, user, generation)
+        except Exception as e:
+            logger.warning("User cache write failed: %s", e)
+            return
+        if not stored:
+            user_cache_stale_writes.inc()
+
+    async def invalidate(self, subject: str):
+        if self.backend is not None:
+            await self.backend.delete(subject)
+            user_cache_invalidations.inc()
+
+
+user_cache = UserCache()
+
+
+response_cache_hits = Counter("response_cache_hits_total", "LLM responses served from the response cache", ("kind",))
+response_cache_misses = Counter("response_cache_misses_total", "Response cache lookups that needed the LLM", ("kind",))
+
+
+class MemoryResponseCacheBackend:
+    """Per-process response cache."""
+
+    def __init__(self):
+        self.cache = TTLCache(settings.response_cache_max_size, settings.response_cache_default_ttl_seconds)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, text: str, ttl: float):
+        self.cache.set(key, text, ttl)
+
+    async def close(self):
+        self.cache.clear()
+
+
+class RedisResponseCacheBackend:
+    """Response cache shared by every worker through Redis."""
+
+    prefix = "response:"
+
+    def __init__(self):
+        if redis is None:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package")
+        self.client = redis.from_url(settings.redis_url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, text: str, ttl: float):
+        await self.client.set(self.prefix + key, text, ex=max(1, int(ttl)))
+
+    async def close(self):
+        await self.client.aclose()
+
+
+RESPONSE_CACHE_BACKENDS = {
+    "memory": MemoryResponseCacheBackend,
+    "redis": RedisResponseCacheBackend,
+}
+
+
+class ResponseCache:
+    """Cache of LLM responses keyed by a normalized intent."""
+
+    backend = None
+
+    async def get(self, key: str, kind: str = "horoscope") -> Optional[str]:
+        if self.backend is None:
+            return None
+        text = await self.backend.get(key)
+        if text is None:
+            response_cache_misses.inc(kind=kind)
+        else:
+            response_cache_hits.inc(kind=kind)
+        return text
+
+    async def set(self, key: str, text: str, ttl: float):
+        if self.backend is not None:
+            await self.backend.set(key, text, ttl)
+
+
+response_cache = ResponseCache()
+
+
+async def connect_to_cache():
+    """Create the configured user and response cache backends."""
+    if settings.user_cache_enabled:
+        backend_class = USER_CACHE_BACKENDS.get(settings.user_cache_backend)
+        if backend_class is None:
+            raise ValueError(f"Unknown user cache backend: {settings.user_cache_backend}")
+        user_cache.backend = backend_class()
+
+    if settings.response_cache_enabled:
+        backend_class = RESPONSE_CACHE_BACKENDS.get(settings.response_cache_backend)
+        if backend_class is None:
+            raise ValueError(f"Unknown response cache backend: {settings.response_cache_backend}")
+        response_cache.backend = backend_class()
+
+
+async def close_cache():
+    """Close the cache backends."""
+    for cache in (user_cache, response_cache):
+        if cache.backend is not None:
+            await cache.backend.close()
+            cache.backend = None
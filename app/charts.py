@@ -0,0 +1,79 @@
+from datetime import date, datetime, time
+from typing import Dict, Optional
+from bson import ObjectId
+from .astrology import natal_chart, parse_birthtime, sun_sign
+from .cache import user_cache
+from .gazetteer import gazetteer, utc_offset_hours
+
+# Bump when the chart engine or stored layout changes so charts get recomputed
+CHART_VERSION = 2
+
+BIRTH_FIELDS = ("birthdate", "birthtime", "birth_location")
+
+
+def compute_user_chart(birthdate: date, birthtime: Optional[str], birth_location: Optional[str]) -> Dict:
+    """Natal chart to store on the user document."""
+    if isinstance(birthdate, datetime):
+        birthdate = birthdate.date()
+
+    place = gazetteer.resolve(birth_location) if birth_location else None
+    if place is None:
+        chart = natal_chart(birthdate, birthtime)
+        location = None
+    else:
+        hour, minute = parse_birthtime(birthtime) or (12, 0)
+        offset = utc_offset_hours(place.timezone, datetime.combine(birthdate, time(hour, minute)))
+        chart = natal_chart(birthdate, birthtime, place.latitude, place.longitude, offset)
+        location = {
+            "name": place.label,
+            "latitude": place.latitude,
+            "longitude": place.longitude,
+            "timezone": place.timezone,
+            "utc_offset_hours": offset,
+        }
+
+    chart["version"] = CHART_VERSION
+    chart["location"] = location
+    return chart
+
+
+def chart_sun_sign(chart: Optional[dict], birthdate: Optional[date]) -> Optional[str]:
+    """
+    The user's sun sign for horoscopes: the natal chart's, so horoscopes agree
+    with the chart facts on cusp days, or the conventional date table for a
+    user whose chart hasn't been computed yet.
+    """
+    if chart and chart.get("sun_sign"):
+        return chart["sun_sign"]
+    if birthdate is None:
+        return None
+    if isinstance(birthdate, datetime):
+        birthdate = birthdate.date()
+    return sun_sign(birthdate)
+
+
+def birth_fields_changed(current_user, update_data: dict) -> bool:
+    """Whether a profile update touches any birth field."""
+    return any(
+        field in update_data and update_data[field] != getattr(current_user, field)
+        for field in BIRTH_FIELDS
+    )
+
+
+def chart_is_current(chart: Optional[dict]) -> bool:
+    return bool(chart) and chart.get("version") == CHART_VERSION
+
+
+async def ensure_natal_chart(user, database) -> Optional[Dict]:
+    """
+    Return the user's stored chart, computing and saving it once for users
+    registered before charts were stored (or with an outdated chart).
+    """
+    chart = getattr(user, "natal_chart", None)
+    if chart_is_current(chart) or not user.birthdate:
+        return chart
+
+    chart = compute_user_chart(user.birthdate, user.birthtime, user.birth_location)
+    await database.users.update_one({"_id": ObjectId(user.id)}, {"$set": {"natal_chart": chart}})
+    await user_cache.invalidate(user.email)
+    return chart
@@ -0,0 +1,129 @@
+"""
+Single-flight coalescing of identical LLM streams.
+
+Concurrent requests whose normalized prompt, model and parameters are the
+same attach to one upstream stream: the first caller starts it, later ones
+replay what has arrived so far and then follow it live. During a burst of
+identical prompts (everyone with the same sign asking for today's horoscope)
+the provider sees one call instead of N.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from .config import settings
+from .instrumentation import measured_stream
+from .metrics import Counter, Gauge
+
+llm_coalesced_requests = Counter(
+    "llm_coalesced_requests_total", "LLM streams by single-flight role", ("role",)
+)
+llm_flights_in_progress = Gauge("llm_flights_in_progress", "Upstream LLM streams currently shared")
+
+
+def prompt_key(messages: List[dict], model: Optional[str], **params) -> str:
+    """Key for a request: whitespace-normalized messages, model and sampling parameters."""
+    normalized = [(message["role"], " ".join(str(message["content"]).split())) for message in messages]
+    payload = json.dumps([normalized, model, sorted(params.items())], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Flight:
+    """One upstream stream and the chunks it has produced so far."""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        self._waiter = asyncio.Event()
+
+    def _notify(self):
+        self._waiter.set()
+        self._waiter = asyncio.Event()
+
+    async def run(self, source: AsyncIterator[str]):
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Replay the chunks so far, then follow the upstream stream."""
+        index = 0
+        while True:
+            waiter = self._waiter
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await waiter.wait()
+
+
+class SingleFlight:
+    """In-process registry of shared upstream streams, keyed by prompt."""
+
+    def __init__(self):
+        self.flights: Dict[str, Flight] = {}
+
+    async def stream(self, key: str, start: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Yield the chunks of the stream for `key`, starting it with `start()`
+        unless an identical one is already in flight.
+
+        The upstream stream is cancelled once every subscriber has gone.
+        """
+        flight = self.flights.get(key)
+        if flight is None:
+            flight = Flight()
+            self.flights[key] = flight
+            flight.task = asyncio.create_task(flight.run(start()))
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+            llm_flights_in_progress.inc()
+            llm_coalesced_requests.inc(role="leader")
+        else:
+            llm_coalesced_requests.inc(role="follower")
+
+        flight.subscribers += 1
+        try:
+            async for chunk in flight.subscribe():
+                yield chunk
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Nobody is listening any more; new requests get a fresh flight
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+                flight.task.cancel()
+
+    def _finish(self, key: str, flight: Flight):
+        # Late requests start a fresh flight instead of replaying a finished one
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+        llm_flights_in_progress.dec()
+
+
+single_flight = SingleFlight()
+
+
+def coalesced_stream(provider, messages: List[dict], model: Optional[str] = None, **params) -> AsyncIterator[str]:
+    """provider.stream(), shared between concurrent identical requests."""
+
+    def start():
+        return measured_stream(provider.stream(messages, model=model, **params), model)
+
+    if not settings.llm_coalescing_enabled:
+        return start()
+    # Followers replay the leader's stream, so each actual LLM call is measured once
+    return single_flight.stream(prompt_key(messages, model, **params), start)
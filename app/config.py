@@ -1,3 +1,4 @@
+import os
 from pydantic_settings import BaseSettings
 from typing import Optional
 from pydantic import Field
@@ -7,19 +8,146 @@ class Settings(BaseSettings):
     # MongoDB Configuration
     mongodb_url: str = "mongodb://localhost:27017"
     database_name: str = "astrology_db"
-    
+    mongo_ensure_indexes: bool = True
+    mongo_explain_hot_queries: bool = False
+
+    # MongoDB connection pool (per worker process: size it as the total budget / workers)
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 10  # opened at startup when warm-up is enabled
+    mongo_pool_warmup: bool = True
+    mongo_max_idle_time_ms: int = 300000
+    mongo_wait_queue_timeout_ms: int = 5000
+    mongo_connect_timeout_ms: int = 5000
+    mongo_server_selection_timeout_ms: int = 5000
+    mongo_socket_timeout_ms: int = 30000
+    mongo_compressors: str = "zstd,snappy,zlib"  # only those whose Python module is installed are used
+    mongo_history_read_preference: str = "secondaryPreferred"
+    mongo_history_max_staleness_seconds: int = 90  # -1 for no limit
+    mongo_chat_write_concern: str = "1"  # "1" or "majority"
+
     # JWT Configuration
     secret_key: str = "your-secret-key-here"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 600
+
+    # Password hashing worker pool (concurrent bcrypt operations, per worker process;
+    # app.server divides the cores between its workers unless this is set)
+    password_hash_workers: int = Field(default_factory=lambda: os.cpu_count() or 1)
     
+    # Redis (optional, shared state across workers)
+    redis_url: str = "redis://localhost:6379/0"
+
+    # Authenticated user cache
+    user_cache_enabled: bool = True
+    user_cache_backend: str = "memory"  # "memory" or "redis"
+    user_cache_ttl_seconds: int = 60
+    user_cache_max_size: int = 10000
+
+    # LLM response cache for horoscope-style prompts
+    response_cache_enabled: bool = True
+    response_cache_backend: str = "memory"  # "memory" or "redis"
+    response_cache_max_size: int = 1000
+    response_cache_default_ttl_seconds: int = 3600
+    horoscope_intent_max_words: int = 8
+    horoscope_default_locale: str = "en"
+
+    # Off-peak daily horoscope precomputation (one horoscope per sign and locale)
+    daily_horoscope_job_enabled: bool = False
+    daily_horoscope_job_hour_utc: int = 1
+    daily_horoscope_concurrency: int = 4
+    daily_horoscope_scan_batch_size: int = 1000
+    daily_horoscope_retention_days: int = 7
+    
+    # Conversation context: verbatim turns within a token budget, older turns summarized
+    chat_context_token_budget: int = 2000
+    chat_context_max_turns: int = 20
+    chat_context_encoding: str = "o200k_base"  # tiktoken encoding, when installed
+    chat_summary_enabled: bool = True
+    chat_summary_min_turns: int = 2
+    chat_summary_max_pending_turns: int = 50  # turns folded per summary LLM call
+    chat_summary_max_tokens: int = 300
+
+    # Chat admission control: per-user token bucket and in-flight generation cap (per worker)
+    chat_rate_limit_enabled: bool = True
+    chat_rate_limit_backend: str = "memory"  # "memory" or "redis"
+    chat_rate_limit_per_minute: float = 20.0
+    chat_rate_limit_burst: int = 5
+    chat_rate_limit_max_users: int = 100000
+    chat_max_concurrent_generations: int = 100  # 0 disables the cap
+    chat_admission_timeout_seconds: float = 5.0
+
+    # Chat history pagination
+    chat_history_page_size: int = 50
+    chat_history_max_page_size: int = 100
+    chat_export_batch_size: int = 500
+
+    # Streamed responses are persisted every N characters or N seconds
+    chat_stream_flush_chars: int = 512
+    chat_stream_flush_interval: float = 1.0
+
+    # SSE streams: heartbeat, client retry hint, replay buffer lifetime and how long
+    # a generation keeps running with no client connected before it is cancelled
+    chat_stream_heartbeat_seconds: float = 15.0
+    chat_stream_retry_ms: int = 3000
+    chat_stream_replay_ttl_seconds: float = 300.0
+    chat_stream_disconnect_grace_seconds: float = 10.0
+
+    # Readiness probe: dependency check timeout and how long an LLM ping result is reused
+    health_check_timeout_seconds: float = 2.0
+    health_check_llm: bool = True
+    health_llm_ping_ttl_seconds: float = 30.0
+
+    # Prometheus scrape endpoint: when set, /metrics requires "Authorization: Bearer <token>"
+    metrics_token: Optional[str] = None
+
+    # Offline gazetteer used to resolve birth locations (see scripts/build_gazetteer.py)
+    gazetteer_path: str = os.path.join(os.path.dirname(__file__), "data", "gazetteer.bin")
+    gazetteer_fuzzy_cutoff: float = 0.8
+
     # App Configuration
     app_name: str = "Astrology Platform"
     debug: bool = True
+    log_level: str = "INFO"
+
+    # Production server (python -m app.server)
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 0  # 0 = one per CPU once the user cache and rate limits use Redis, else 1
+    server_keepalive_seconds: int = 75  # above the proxy's upstream keep-alive timeout
+    server_graceful_shutdown_seconds: float = 30.0  # open connections (SSE streams) finish
+    server_drain_seconds: float = 15.0  # then detached generations finish
+    server_backlog: int = 2048
+    server_forwarded_allow_ips: str = "127.0.0.1"
+    server_access_log: bool = False
     
     # OpenAI Configuration
     openai_api_key: str = Field(default="sk-proj-1234567890", alias="open_ai_key")
-    
+    openai_base_url: Optional[str] = None
+
+    # LLM Provider Configuration
+    llm_provider: str = "openai"  # "openai" or "local"
+    llm_chat_model: str = "gpt-5"
+    llm_stream_model: str = "gpt-4.1"
+    llm_temperature: float = 0.1
+    llm_max_tokens: int = 1000
+    llm_summary_model: str = "gpt-4.1-mini"
+    llm_coalescing_enabled: bool = True  # share one upstream stream between identical prompts
+
+    # Local (fake) LLM provider, for offline load testing
+    local_llm_ttft_ms: float = 300.0
+    local_llm_tokens_per_second: float = 50.0
+    local_llm_response_tokens: int = 200
+    local_llm_failure_rate: float = 0.0
+    local_llm_seed: int = 0
+
+    # LLM HTTP client pool
+    llm_max_connections: int = 200
+    llm_max_keepalive_connections: int = 50
+    llm_keepalive_expiry: float = 30.0
+    llm_timeout: float = 120.0
+    llm_connect_timeout: float = 5.0
+    llm_max_retries: int = 2
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -0,0 +1,257 @@
+"""
+Token-budgeted conversation context.
+
+Prompts carry the newest turns verbatim up to CHAT_CONTEXT_TOKEN_BUDGET, and
+everything older is folded into a rolling per-user summary in the
+``conversation_summaries`` collection. The summary is updated in the
+background after each exchange, so building a prompt never waits on the LLM
+and prompt size stays flat however long the conversation gets.
+"""
+
+import logging
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from .config import settings
+from .instrumentation import measured_stream, stage
+from .llm import get_llm_provider
+from .metrics import Counter
+from .prompts import CONVERSATION_SUMMARY_SYSTEM
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; token counts fall back to an estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Per-turn overhead of the chat format (role markers, separators)
+TURN_OVERHEAD_TOKENS = 8
+
+CONTEXT_PROJECTION = {"message": 1, "response": 1, "created_at": 1}
+
+conversation_summaries_updated = Counter(
+    "conversation_summaries_updated_total", "Rolling conversation summary updates", ("result",)
+)
+
+
+class _Tokenizer:
+    encoding = None
+    loaded = False
+
+
+_tokenizer = _Tokenizer()
+
+
+def count_tokens(text: str) -> int:
+    """
+    Tokens in `text`, using tiktoken when it and its encoding are available
+    locally and roughly four characters per token otherwise.
+    """
+    if not _tokenizer.loaded:
+        _tokenizer.loaded = True
+        if tiktoken is not None:
+            try:
+                _tokenizer.encoding = tiktoken.get_encoding(settings.chat_context_encoding)
+            except Exception as e:  # the encoding file may not be downloadable
+                logger.warning("tiktoken encoding unavailable, estimating tokens: %s", e)
+    if _tokenizer.encoding is not None:
+        return len(_tokenizer.encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def turn_tokens(turn: dict) -> int:
+    return count_tokens(turn["message"]) + count_tokens(turn["response"]) + TURN_OVERHEAD_TOKENS
+
+
+class ConversationContext(NamedTuple):
+    summary: Optional[str]
+    turns: List[dict]  # oldest first, each with "message" and "response"
+    tokens: int
+
+
+def _truncate_turn(turn: dict, budget: int) -> Optional[dict]:
+    """The turn with its response cut to fit `budget`, or None if even the question doesn't fit."""
+    # One token is left for the ellipsis
+    available = budget - count_tokens(turn["message"]) - TURN_OVERHEAD_TOKENS - 1
+    response_tokens = count_tokens(turn["response"])
+    if available <= 0 or response_tokens == 0:
+        return None
+    cut = int(len(turn["response"]) * available / response_tokens)
+    return {**turn, "response": turn["response"][:cut].rstrip() + " …"}
+
+
+def fit_turns(turns_newest_first: List[dict], budget: int) -> List[dict]:
+    """
+    The newest turns whose combined size fits the budget, oldest first.
+
+    The latest turn is kept (with its answer shortened) even when it alone
+    exceeds the budget, since follow-up questions usually refer to it.
+    """
+    kept, used = [], 0
+    for turn in turns_newest_first:
+        cost = turn_tokens(turn)
+        if used + cost > budget:
+            if not kept:
+                truncated = _truncate_turn(turn, budget)
+                if truncated is not None:
+                    kept.append(truncated)
+            break
+        kept.append(turn)
+        used += cost
+    return list(reversed(kept))
+
+
+async def _recent_turns(database, user_id: str, after: Optional[datetime], limit: int) -> List[dict]:
+    """Answered turns newer than `after`, newest first."""
+    query = {"user_id": user_id, "response": {"$exists": True}}
+    if after is not None:
+        query["created_at"] = {"$gt": after}
+    cursor = database.chat_messages.find(query, CONTEXT_PROJECTION).sort("created_at", -1).limit(limit)
+    with stage("mongo_find"):
+        return await cursor.to_list(length=limit)
+
+
+async def build_context(database, user_id: str) -> ConversationContext:
+    """Rolling summary plus the newest turns it doesn't cover, within the token budget."""
+    summary_doc = None
+    if settings.chat_summary_enabled:
+        summary_doc = await database.conversation_summaries.find_one({"_id": user_id})
+    summary = summary_doc["summary"] if summary_doc else None
+    covered_until = summary_doc["covered_until"] if summary_doc else None
+
+    budget = settings.chat_context_token_budget
+    summary_tokens = count_tokens(summary) if summary else 0
+    recent = await _recent_turns(database, user_id, covered_until, settings.chat_context_max_turns)
+    turns = fit_turns(recent, max(0, budget - summary_tokens))
+    return ConversationContext(summary, turns, summary_tokens + sum(turn_tokens(turn) for turn in turns))
+
+
+def summary_messages(summary: Optional[str], turns: List[dict]) -> List[dict]:
+    exchanges = "\n\n".join(f"User: {turn['message']}\nAstrologer: {turn['response']}" for turn in turns)
+    return [
+        {"role": "system", "content": CONVERSATION_SUMMARY_SYSTEM.render(
+            max_words=int(settings.chat_summary_max_tokens * 0.75)
+        )},
+        {"role": "user", "content": (
+            f"Existing summary:\n{summary or '(none)'}\n\nNew exchanges:\n{exchanges}"
+        )},
+    ]
+
+
+async def _pending_turns(database, user_id: str, after: Optional[datetime], before: datetime, limit: int) -> List[dict]:
+    """Answered turns between `after` and `before`, oldest first."""
+    query = {"user_id": user_id, "response": {"$exists": True}, "created_at": {"$lt": before}}
+    if after is not None:
+        query["created_at"]["$gt"] = after
+    cursor = database.chat_messages.find(query, CONTEXT_PROJECTION).sort("created_at", 1).limit(limit)
+    with stage("mongo_find"):
+        return await cursor.to_list(length=limit)
+
+
+async def _fold_turns(database, user_id: str, summary_doc: Optional[dict], turns: List[dict]) -> Optional[dict]:
+    """
+    Fold `turns` (oldest first) into the summary with one LLM call. Returns
+    the updated summary document, or None when nothing was written.
+    """
+    summary = summary_doc["summary"] if summary_doc else None
+    covered_until = summary_doc["covered_until"] if summary_doc else None
+
+    chunks = []
+    stream = get_llm_provider().stream(
+        summary_messages(summary, turns),
+        model=settings.llm_summary_model,
+        temperature=settings.llm_temperature,
+        max_tokens=settings.chat_summary_max_tokens,
+    )
+    async for chunk in measured_stream(stream, settings.llm_summary_model):
+        chunks.append(chunk)
+    new_summary = "".join(chunks).strip()
+    if not new_summary:
+        conversation_summaries_updated.inc(result="empty")
+        return None
+
+    fields = {
+        "summary": new_summary,
+        "covered_until": turns[-1]["created_at"],
+        "turns": (summary_doc or {}).get("turns", 0) + len(turns),
+        "updated_at": datetime.utcnow(),
+    }
+    try:
+        result = await database.conversation_summaries.update_one(
+            {"_id": user_id, "covered_until": covered_until}, {"$set": fields}, upsert=True
+        )
+    except DuplicateKeyError:
+        # Another update moved the summary first; its result wins
+        conversation_summaries_updated.inc(result="conflict")
+        return None
+    if not (result.modified_count or result.upserted_id):
+        conversation_summaries_updated.inc(result="conflict")
+        return None
+    conversation_summaries_updated.inc(result="updated")
+    return {"_id": user_id, **fields}
+
+
+async def update_summary(database, user_id: str):
+    """
+    Fold turns that no longer fit the verbatim window into the rolling summary.
+
+    Runs after an exchange, off the request path. Turns are only folded in
+    batches of CHAT_SUMMARY_MIN_TURNS so most exchanges cost no LLM call, and
+    each write is conditional on the summary not having moved meanwhile.
+    A long unsummarized history (users from before summaries existed) is
+    folded oldest first, CHAT_SUMMARY_MAX_PENDING_TURNS per LLM call.
+    """
+    if not settings.chat_summary_enabled:
+        return
+    summary_doc = await database.conversation_summaries.find_one({"_id": user_id})
+    summary = summary_doc["summary"] if summary_doc else None
+    covered_until = summary_doc["covered_until"] if summary_doc else None
+
+    # The verbatim window: everything older than its first turn gets folded
+    recent = await _recent_turns(database, user_id, covered_until, settings.chat_context_max_turns)
+    budget = max(0, settings.chat_context_token_budget - (count_tokens(summary) if summary else 0))
+    window = fit_turns(recent, budget)
+    if not window:
+        return
+    window_start = window[0]["created_at"]
+
+    while True:
+        covered_until = summary_doc["covered_until"] if summary_doc else None
+        to_fold = await _pending_turns(
+            database, user_id, covered_until, window_start, settings.chat_summary_max_pending_turns
+        )
+        if len(to_fold) < settings.chat_summary_min_turns:
+            return
+        summary_doc = await _fold_turns(database, user_id, summary_doc, to_fold)
+        if summary_doc is None:
+            return
+
+
+async def update_summary_safely(database, user_id: str):
+    """Background wrapper: a failed summary update only costs context, never the chat."""
+    try:
+        await update_summary(database, user_id)
+    except Exception as e:
+        conversation_summaries_updated.inc(result="failed")
+        logger.warning("Conversation summary update failed for %s: %s", user_id, e)
+
+
+def format_turns(turns: List[dict]) -> str:
+    """Verbatim turns as a prompt section, for single-prompt completions."""
+    if not turns:
+        return ""
+    return "### Previous Conversation Context:\n" + "\n".join(
+        f"User: {turn['message']}\nAstrologer: {turn['response']}" for turn in turns
+    )
+
+
+def context_messages(context: ConversationContext) -> List[dict]:
+    """Verbatim turns as chat messages."""
+    messages = []
+    for turn in context.turns:
+        messages.append({"role": "user", "content": turn["message"]})
+        messages.append({"role": "assistant", "content": turn["response"]})
+    return messages
@@ -1,29 +1,170 @@
+import asyncio
+import importlib.util
+import logging
+from typing import List
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+from pymongo.write_concern import WriteConcern
 from .config import settings
+from .metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
 
 
 class Database:
     client: AsyncIOMotorClient = None
     database = None
+    indexes_ready: bool = False
 
 
 db = Database()
 
+mongo_pool_max_size = Gauge("mongo_pool_max_size", "Configured MongoDB connection pool size per server")
+mongo_pool_connections = Gauge("mongo_pool_connections", "Open MongoDB connections", ("address",))
+mongo_pool_checked_out = Gauge("mongo_pool_checked_out", "MongoDB connections in use", ("address",))
+mongo_pool_waiting = Gauge("mongo_pool_waiting", "Operations waiting for a MongoDB connection", ("address",))
+mongo_pool_checkout_failures = Counter(
+    "mongo_pool_checkout_failures_total", "MongoDB connection checkouts that failed", ("address", "reason")
+)
+mongo_pool_cleared = Counter("mongo_pool_cleared_total", "MongoDB connection pools cleared after errors", ("address",))
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Mirror connection pool events into the metrics registry (called from driver threads)."""
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        mongo_pool_cleared.inc(address=_address(event))
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc(address=_address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec(address=_address(event))
+
+    def connection_check_out_started(self, event):
+        mongo_pool_waiting.inc(address=_address(event))
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_waiting.dec(address=_address(event))
+        mongo_pool_checkout_failures.inc(address=_address(event), reason=event.reason)
+
+    def connection_checked_out(self, event):
+        mongo_pool_waiting.dec(address=_address(event))
+        mongo_pool_checked_out.inc(address=_address(event))
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec(address=_address(event))
+
+
+# Wire compressors and the module each one needs
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+
+def available_compressors() -> List[str]:
+    """Configured compressors whose Python module is installed, in preference order."""
+    compressors = []
+    for name in settings.mongo_compressors.split(","):
+        name = name.strip()
+        module = COMPRESSOR_MODULES.get(name)
+        if module and importlib.util.find_spec(module) is not None:
+            compressors.append(name)
+    return compressors
+
+
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+        "waitQueueTimeoutMS": settings.mongo_wait_queue_timeout_ms,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "socketTimeoutMS": settings.mongo_socket_timeout_ms,
+        "appname": settings.app_name,
+        "event_listeners": [PoolMetricsListener()],
+    }
+    compressors = available_compressors()
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+
+async def warm_up_pool():
+    """Open MONGO_MIN_POOL_SIZE connections up front, so the first requests don't pay for handshakes."""
+    connections = settings.mongo_min_pool_size if settings.mongo_pool_warmup else 0
+    if connections <= 0:
+        return
+    try:
+        # Concurrent pings each need their own connection
+        await asyncio.gather(*(db.client.admin.command("ping") for _ in range(connections)))
+        logger.info("Warmed up %d MongoDB connections.", connections)
+    except Exception as e:
+        logger.warning("MongoDB pool warm-up failed: %s", e)
+
 
 async def connect_to_mongo():
     """Create database connection."""
-    db.client = AsyncIOMotorClient(settings.mongodb_url)
+    db.client = AsyncIOMotorClient(settings.mongodb_url, **client_options())
     db.database = db.client[settings.database_name]
-    print("Connected to MongoDB.")
+    mongo_pool_max_size.set(settings.mongo_max_pool_size)
+    logger.info("Connected to MongoDB.")
+    await warm_up_pool()
 
 
 async def close_mongo_connection():
     """Close database connection."""
     if db.client:
         db.client.close()
-        print("Disconnected from MongoDB.")
+        logger.info("Disconnected from MongoDB.")
 
 
 def get_database():
     """Get database instance."""
     return db.database
+
+
+def _write_concern(w: str) -> WriteConcern:
+    return WriteConcern(w=int(w) if w.isdigit() else w)
+
+
+def chat_writes(database):
+    """
+    chat_messages with the chat write concern (MONGO_CHAT_WRITE_CONCERN,
+    w=1 by default): user messages and streamed chunks are acknowledged by
+    the primary alone instead of waiting for a majority of the replica set.
+    """
+    return database.get_collection(
+        "chat_messages", write_concern=_write_concern(settings.mongo_chat_write_concern)
+    )
+
+
+def chat_history(database):
+    """
+    chat_messages with the history read preference (MONGO_HISTORY_READ_PREFERENCE,
+    secondaryPreferred by default), for history pages and exports that can
+    tolerate replication lag up to MONGO_HISTORY_MAX_STALENESS_SECONDS.
+    """
+    mode = read_pref_mode_from_name(settings.mongo_history_read_preference)
+    max_staleness = settings.mongo_history_max_staleness_seconds if mode else -1
+    return database.get_collection(
+        "chat_messages", read_preference=make_read_preference(mode, None, max_staleness)
+    )
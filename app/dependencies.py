@@ -2,10 +2,12 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from .database import get_database
 from .auth import verify_token
+from .cache import user_cache
+from .instrumentation import stage
+from .ratelimit import Admission, AdmissionRejected, admission_control
 from .models.user import TokenData, UserInDB
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
-from datetime import datetime
 
 security = HTTPBearer()
 
@@ -21,30 +23,52 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token_data = verify_token(credentials.credentials)
+    with stage("jwt_verify"):
+        token_data = verify_token(credentials.credentials)
     if token_data is None:
         raise credentials_exception
     
-    # Find user by email
-    user_dict = await database.users.find_one({"email": token_data.email})
+    with stage("user_lookup"):
+        # Serve from the user cache when possible
+        user = await user_cache.get(token_data.email)
+        if user is not None:
+            return user
+        # Taken before the read, so an invalidation during it keeps the result out of the cache
+        generation = await user_cache.generation(token_data.email)
+        
+        # Find user by email
+        user_dict = await database.users.find_one({"email": token_data.email})
     if user_dict is None:
         raise credentials_exception
     
-    # Convert ObjectId to string for Pydantic
-    user_dict["_id"] = str(user_dict["_id"])
-    
-    # Convert birthdate from datetime to date if needed
-    if isinstance(user_dict.get("birthdate"), datetime):
-        user_dict["birthdate"] = user_dict["birthdate"].date()
-    
-    return UserInDB(**user_dict)
+    # Our own record, validated when it was written
+    user = UserInDB.from_mongo(user_dict)
+    await user_cache.set(token_data.email, user, generation)
+    return user
+
+
+async def admit_chat_generation(current_user: UserInDB) -> Admission:
+    """
+    Rate-limit the current user and take a generation slot; the caller releases it.
+
+    Called from the handler rather than as a dependency: dependencies run
+    before the body is validated, so a 422 would leak the slot and the token.
+    """
+    try:
+        return await admission_control.admit(current_user.id)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many chat requests, slow down" if e.reason == "rate_limited"
+            else "The astrologer is busy, please retry shortly",
+            headers={"Retry-After": e.retry_after_header},
+        )
 
 
 async def get_current_active_user(
     current_user: UserInDB = Depends(get_current_user)
 ) -> UserInDB:
     """Get current active user."""
-    print("current_user", current_user)
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
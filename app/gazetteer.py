@@ -0,0 +1,311 @@
+"""
+Offline gazetteer: city name -> coordinates and IANA timezone.
+
+The index is a single read-only file that is memory-mapped on first use, so
+workers share its pages and nothing is parsed at startup. Layout (little-endian):
+
+    header     MAGIC, city count, key count, key/label/timezone blob sizes
+    cities     CITY_DTYPE records, most populous first
+    keys       KEY_DTYPE records sorted by folded name (bytewise)
+    key blob   folded ASCII names referenced by the key records
+    labels     UTF-8 display labels ("Paris, France") referenced by the cities
+    timezones  newline-separated IANA names indexed by CITY_DTYPE.timezone
+
+Lookups binary-search the sorted keys directly in the mapping.
+"""
+
+import difflib
+import logging
+import mmap
+import re
+import struct
+import threading
+import unicodedata
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+import pytz
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GAZ1"
+HEADER = struct.Struct("<4sIIIII")
+CITY_DTYPE = np.dtype([
+    ("latitude", "<f4"),
+    ("longitude", "<f4"),
+    ("population", "<u4"),
+    ("label_offset", "<u4"),
+    ("label_length", "<u2"),
+    ("name_length", "<u2"),
+    ("timezone", "<u2"),
+    ("country", "S2"),
+])
+# alias is 1 for alternate names (exonyms, former names), 0 for the city's own name;
+# letters is a bitmask of the a-z letters in the key, used to prefilter fuzzy matches
+KEY_DTYPE = np.dtype([
+    ("offset", "<u4"),
+    ("city", "<u4"),
+    ("letters", "<u4"),
+    ("length", "<u2"),
+    ("alias", "u1"),
+])
+
+# Birth locations often name the state by its postal code ("Paris, TX"); the
+# labels spell US states out (ISO 3166-2:US, as in the builder's admin1 codes)
+US_STATES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California",
+    "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware", "DC": "District of Columbia",
+    "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois",
+    "IN": "Indiana", "IA": "Iowa", "KS": "Kansas", "KY": "Kentucky", "LA": "Louisiana",
+    "ME": "Maine", "MD": "Maryland", "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota",
+    "MS": "Mississippi", "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
+    "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York",
+    "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma", "OR": "Oregon",
+    "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota",
+    "TN": "Tennessee", "TX": "Texas", "UT": "Utah", "VT": "Vermont", "VA": "Virginia",
+    "WA": "Washington", "WV": "West Virginia", "WI": "Wisconsin", "WY": "Wyoming",
+}
+# Canadian labels stop at the country, so a province code only narrows it to Canada
+CA_PROVINCES = {"AB", "BC", "MB", "NB", "NL", "NS", "NT", "NU", "ON", "PE", "QC", "SK", "YT"}
+# Common country names that differ from the GeoNames name in the labels
+COUNTRY_ALIASES = {
+    "usa": "us", "america": "us", "united states of america": "us",
+    "uk": "gb", "britain": "gb", "great britain": "gb",
+    "england": "gb", "scotland": "gb", "wales": "gb", "northern ireland": "gb",
+    "uae": "ae", "holland": "nl",
+}
+
+_SEPARATORS_RE = re.compile(r"[\s\-'’`.,/()]+")
+# Latin letters that have no decomposition to a base letter
+_LETTERS = str.maketrans({"ı": "i", "ø": "o", "ł": "l", "đ": "d", "ð": "d", "ħ": "h", "þ": "th", "ß": "ss", "æ": "ae", "œ": "oe"})
+
+
+def fold(text: str) -> str:
+    """Lowercase ASCII search key: "Saint-Étienne" -> "saint etienne"."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower().translate(_LETTERS)
+    return _SEPARATORS_RE.sub(" ", text).strip()
+
+
+def letter_mask(key: str) -> int:
+    mask = 0
+    for ch in key:
+        if "a" <= ch <= "z":
+            mask |= 1 << (ord(ch) - 97)
+    return mask
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    values = values - ((values >> 1) & 0x55555555)
+    values = (values & 0x33333333) + ((values >> 2) & 0x33333333)
+    values = (values + (values >> 4)) & 0x0F0F0F0F
+    return (values * 0x01010101) >> 24
+
+
+class Place(NamedTuple):
+    name: str
+    label: str
+    country: str
+    latitude: float
+    longitude: float
+    timezone: str
+    population: int
+
+
+class _Keys:
+    """Sequence view of the sorted key strings, for bisect."""
+
+    def __init__(self, buffer: mmap.mmap, base: int, records: np.ndarray):
+        self.buffer = buffer
+        self.base = base
+        self.offsets = records["offset"].tolist()
+        self.lengths = records["length"].tolist()
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, index: int) -> bytes:
+        start = self.base + self.offsets[index]
+        return self.buffer[start:start + self.lengths[index]]
+
+
+class Gazetteer:
+    """Prefix and fuzzy city lookup over the memory-mapped index."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._buffer = None
+
+    @property
+    def available(self) -> bool:
+        self._ensure_loaded()
+        return self._buffer is not None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            path = self.path or settings.gazetteer_path
+            try:
+                with open(path, "rb") as f:
+                    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError) as e:
+                logger.warning("Gazetteer unavailable (%s): %s", path, e)
+                self._loaded = True
+                return
+
+            magic, city_count, key_count, key_blob_size, label_size, timezone_size = HEADER.unpack_from(buffer)
+            if magic != MAGIC:
+                logger.warning("Gazetteer unavailable (%s): unknown format %r", path, magic)
+                self._loaded = True
+                return
+
+            offset = HEADER.size
+            self._cities = np.frombuffer(buffer, dtype=CITY_DTYPE, count=city_count, offset=offset)
+            offset += self._cities.nbytes
+            key_records = np.frombuffer(buffer, dtype=KEY_DTYPE, count=key_count, offset=offset)
+            offset += key_records.nbytes
+            self._keys = _Keys(buffer, offset, key_records)
+            self._key_cities = key_records["city"]
+            self._key_lengths = key_records["length"]
+            self._key_aliases = key_records["alias"]
+            self._key_letters = key_records["letters"]
+            offset += key_blob_size
+            self._label_base = offset
+            offset += label_size
+            self._timezones = buffer[offset:offset + timezone_size].decode("ascii").split("\n")
+            self._buffer = buffer
+            self._loaded = True
+
+    def _place(self, index: int) -> Place:
+        city = self._cities[index]
+        start = self._label_base + int(city["label_offset"])
+        label = self._buffer[start:start + int(city["label_length"])].decode("utf-8")
+        name = label.encode("utf-8")[:int(city["name_length"])].decode("utf-8")
+        return Place(
+            name=name,
+            label=label,
+            country=city["country"].decode("ascii"),
+            latitude=round(float(city["latitude"]), 4),
+            longitude=round(float(city["longitude"]), 4),
+            timezone=self._timezones[int(city["timezone"])],
+            population=int(city["population"]),
+        )
+
+    def _prefix_range(self, key: bytes) -> tuple:
+        lo = bisect_left(self._keys, key)
+        return lo, bisect_left(self._keys, key + b"\xff", lo)
+
+    def _ranked(self, indexes: np.ndarray, limit: int) -> List[int]:
+        """Distinct cities, most populous first (cities are stored in that order)."""
+        return np.unique(indexes)[:limit].tolist()
+
+    def _prefix(self, key: bytes, limit: int) -> List[int]:
+        lo, hi = self._prefix_range(key)
+        if lo == hi:
+            return []
+        # Exact names first, then cities whose own name starts with the query,
+        # then cities only matched through an alternate name
+        exact_hi = bisect_right(self._keys, key, lo, hi)
+        cities = self._key_cities[exact_hi:hi]
+        aliases = self._key_aliases[exact_hi:hi].astype(bool)
+        result = []
+        for group in (self._key_cities[lo:exact_hi], cities[~aliases], cities[aliases]):
+            for index in self._ranked(group, limit + len(result)):
+                if index not in result:
+                    result.append(index)
+            if len(result) >= limit:
+                break
+        return result[:limit]
+
+    def _fuzzy(self, key: str, limit: int) -> List[int]:
+        """Close matches among keys sharing the first letters and a similar length."""
+        cutoff = settings.gazetteer_fuzzy_cutoff
+        mask = np.uint32(letter_mask(key))
+        for prefix_length in (2, 1):
+            lo, hi = self._prefix_range(key[:prefix_length].encode("ascii"))
+            lengths = self._key_lengths[lo:hi].astype(np.int32)
+            # A couple of typos change the length and the set of letters only slightly
+            close = (np.abs(lengths - len(key)) <= 2) & (_popcount(self._key_letters[lo:hi] ^ mask) <= 3)
+            candidates = np.nonzero(close)[0] + lo
+
+            matcher = difflib.SequenceMatcher(b=key)
+            scored = []
+            for position in candidates.tolist():
+                matcher.set_seq1(self._keys[position].decode("ascii"))
+                if matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff:
+                    ratio = matcher.ratio()
+                    if ratio >= cutoff:
+                        scored.append((-ratio, int(self._key_cities[position])))
+            if scored:
+                scored.sort()
+                seen, result = set(), []
+                for _, index in scored:
+                    if index not in seen:
+                        seen.add(index)
+                        result.append(index)
+                return result[:limit]
+        return []
+
+    def search(self, query: str, limit: int = 10) -> List[Place]:
+        """Cities whose name starts with `query`, falling back to close spellings."""
+        key = fold(query)
+        if not key or not key.isascii() or not self.available:
+            return []
+        indexes = self._prefix(key.encode("ascii"), limit) or self._fuzzy(key, limit)
+        return [self._place(index) for index in indexes]
+
+    def resolve(self, location: str) -> Optional[Place]:
+        """
+        Best match for a free-text birth location such as "Pune, India".
+
+        The first comma-separated part is the city; the rest (state, state
+        code, country or country code) disambiguates between cities with the
+        same name. A location whose hints match none of them is left
+        unresolved rather than placed in the most populous namesake.
+        """
+        parts = [fold(part) for part in location.split(",")]
+        key = parts[0] if parts else ""
+        if not key or not key.isascii() or not self.available:
+            return None
+
+        lo, hi = self._prefix_range(key.encode("ascii"))
+        exact_hi = bisect_right(self._keys, key.encode("ascii"), lo, hi)
+        indexes = self._ranked(self._key_cities[lo:exact_hi], 50) or self._fuzzy(key, 50)
+        if not indexes:
+            return None
+
+        places = [self._place(index) for index in indexes]
+        hints = set()
+        for part in parts[1:]:
+            if part:
+                hints.add(part)
+                if part.upper() in US_STATES:
+                    hints.add(fold(US_STATES[part.upper()]))
+                if part.upper() in CA_PROVINCES:
+                    hints.add("ca")
+                if part in COUNTRY_ALIASES:
+                    hints.add(COUNTRY_ALIASES[part])
+        if not hints:
+            return places[0]
+        for place in places:
+            if hints & ({fold(part) for part in place.label.split(",")[1:]} | {place.country.lower()}):
+                return place
+        return None
+
+
+gazetteer = Gazetteer()
+
+
+def utc_offset_hours(timezone: str, local_time: datetime) -> float:
+    """UTC offset in effect at a local wall-clock time, from the tz database history."""
+    localized = pytz.timezone(timezone).localize(local_time)
+    return localized.utcoffset().total_seconds() / 3600.0
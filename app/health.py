@@ -0,0 +1,130 @@
+"""
+Liveness, readiness and startup warm-up.
+
+A worker is live as soon as its event loop answers. It is ready once the
+startup warm-up has run and its dependencies answer: MongoDB pings, the
+index bootstrap succeeded and the LLM provider is reachable. Load balancers
+and the compose healthcheck poll readiness, so traffic only reaches workers
+whose pools are already open.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+
+from .astrology import chart_facts, current_positions, natal_chart
+from .config import settings
+from .context import count_tokens
+from .database import db
+from .gazetteer import gazetteer
+from .llm import get_llm_provider
+from .metrics import Gauge
+from .prompts import PROMPTS
+from .streaming import stream_registry
+
+logger = logging.getLogger(__name__)
+
+app_ready = Gauge("app_ready", "1 when the worker passes its readiness checks")
+app_warmup_seconds = Gauge("app_warmup_seconds", "Duration of the startup warm-up")
+
+
+class Readiness:
+    warmed_up = False
+    draining = False
+    # Last LLM ping: (monotonic time, error or None)
+    llm_ping: Optional[Tuple[float, Optional[str]]] = None
+
+
+readiness = Readiness()
+
+
+async def _check(name: str, probe) -> Tuple[str, str]:
+    try:
+        await asyncio.wait_for(probe(), settings.health_check_timeout_seconds)
+        return name, "ok"
+    except asyncio.TimeoutError:
+        return name, "timeout"
+    except Exception as e:
+        return name, f"error: {e}"
+
+
+async def _ping_mongo():
+    if db.client is None:
+        raise RuntimeError("not connected")
+    await db.client.admin.command("ping")
+
+
+async def _check_indexes():
+    if settings.mongo_ensure_indexes and not db.indexes_ready:
+        raise RuntimeError("index bootstrap incomplete")
+
+
+async def _ping_llm():
+    # Probes arrive every few seconds per worker; the provider is asked at most once per TTL
+    now = time.monotonic()
+    if readiness.llm_ping is None or now - readiness.llm_ping[0] >= settings.health_llm_ping_ttl_seconds:
+        provider = get_llm_provider()
+        try:
+            if provider is None:
+                raise RuntimeError("no provider")
+            await provider.ping()
+            readiness.llm_ping = (now, None)
+        except Exception as e:
+            readiness.llm_ping = (now, str(e) or type(e).__name__)
+    error = readiness.llm_ping[1]
+    if error is not None:
+        raise RuntimeError(error)
+
+
+async def check_readiness() -> Tuple[bool, Dict[str, str]]:
+    """Run the readiness checks concurrently; returns (ready, status per check)."""
+    probes = [("mongo", _ping_mongo), ("indexes", _check_indexes)]
+    if settings.health_check_llm:
+        probes.append(("llm", _ping_llm))
+    checks = dict(await asyncio.gather(*(_check(name, probe) for name, probe in probes)))
+    checks["warmup"] = "ok" if readiness.warmed_up else "pending"
+    if readiness.draining:
+        checks["shutdown"] = "draining"
+    ready = all(state == "ok" for state in checks.values())
+    app_ready.set(1 if ready else 0)
+    return ready, checks
+
+
+async def drain():
+    """
+    Shutdown: fail readiness, then give generations still running (including
+    detached ones whose client went away) SERVER_DRAIN_SECONDS to finish
+    before any connection pool closes.
+    """
+    readiness.draining = True
+    app_ready.set(0)
+    running = sum(1 for session in stream_registry.sessions.values() if not session.done)
+    if running:
+        logger.info("Draining %d in-flight stream(s).", running)
+    cancelled = await stream_registry.drain(settings.server_drain_seconds)
+    if cancelled:
+        logger.warning("Cancelled %d stream(s) still running after %ss.", cancelled, settings.server_drain_seconds)
+
+
+def _warm_up_compute():
+    # First calls pay for lazy loading: the gazetteer mapping, NumPy ephemeris
+    # code paths, the tokenizer's encoding file
+    gazetteer.resolve("London")
+    chart = natal_chart(date(2000, 1, 1), "12:00 PM")
+    chart_facts(chart, current_positions(datetime.utcnow()))
+    count_tokens("warm up")
+
+
+async def warm_up():
+    """Prime everything the first requests would otherwise pay for, then allow readiness."""
+    started = time.perf_counter()
+    _warm_up_compute()
+    logger.info("Loaded %d prompt templates.", len(PROMPTS))
+    if settings.health_check_llm:
+        # Opens (and keeps alive) the first connection to the provider
+        await _check("llm", _ping_llm)
+    readiness.warmed_up = True
+    app_warmup_seconds.set(time.perf_counter() - started)
+    logger.info("Warm-up finished in %.2fs.", time.perf_counter() - started)
@@ -0,0 +1,181 @@
+import re
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, NamedTuple, Optional
+from .astrology import ZODIAC_SIGNS
+from .cache import response_cache
+from .coalescing import coalesced_stream
+from .config import settings
+from .database import get_database
+from .llm import get_llm_provider
+from .metrics import Counter
+from .prompts import HOROSCOPE_SYSTEM
+
+PERIOD_KEYWORDS = (
+    ("weekly", ("weekly", "week")),
+    ("monthly", ("monthly", "month")),
+    ("yearly", ("yearly", "year", "annual", "annually")),
+    ("daily", ("daily", "today", "todays", "day")),
+)
+
+_WORD_RE = re.compile(r"[a-z]+")
+_SIGN_NAMES = {sign.lower(): sign for sign in ZODIAC_SIGNS}
+
+# Filler words allowed around "horoscope"; anything else means a personal question
+_FILLER_WORDS = {
+    "a", "about", "can", "for", "get", "give", "i", "is", "it", "me", "my", "of", "please",
+    "s", "send", "show", "sign", "tell", "the", "this", "what", "whats", "you", "your", "zodiac",
+}
+_HOROSCOPE_VOCABULARY = (
+    {"horoscope"} | _FILLER_WORDS | set(_SIGN_NAMES)
+    | {keyword for _, keywords in PERIOD_KEYWORDS for keyword in keywords}
+)
+
+daily_horoscope_lookups = Counter(
+    "daily_horoscope_lookups_total", "Daily horoscope requests checked against the precomputed store", ("result",)
+)
+
+
+class HoroscopeIntent(NamedTuple):
+    period: str
+    sign: str
+    start: date
+    end: date
+    locale: str = "en"
+
+    @property
+    def key(self) -> str:
+        return f"horoscope:{self.period}:{self.sign}:{self.locale}:{self.start.isoformat()}"
+
+    def ttl(self, now: datetime) -> float:
+        """Seconds until the end of the period."""
+        expires_at = datetime.combine(self.end + timedelta(days=1), datetime.min.time())
+        return max(1.0, (expires_at - now).total_seconds())
+
+
+def period_window(period: str, today: date) -> tuple:
+    """First and last day of the period containing `today`."""
+    if period == "weekly":
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6)
+    if period == "monthly":
+        start = today.replace(day=1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return start, next_month - timedelta(days=1)
+    if period == "yearly":
+        return today.replace(month=1, day=1), today.replace(month=12, day=31)
+    return today, today
+
+
+def detect_horoscope_intent(
+    message: str,
+    user_sign: Optional[str],
+    today: date,
+    locale: Optional[str] = None,
+) -> Optional[HoroscopeIntent]:
+    """
+    Recognize a plain horoscope request such as "my daily horoscope" or
+    "leo horoscope this week".
+
+    Only short messages whose words are all horoscope vocabulary qualify, so
+    anything personal or open-ended still goes to the full chat pipeline.
+    """
+    words = _WORD_RE.findall(message.lower())
+    if "horoscope" not in words or len(words) > settings.horoscope_intent_max_words:
+        return None
+    if any(word not in _HOROSCOPE_VOCABULARY for word in words):
+        return None
+
+    period = "daily"
+    for name, keywords in PERIOD_KEYWORDS:
+        if any(word in keywords for word in words):
+            period = name
+            break
+
+    named_signs = [_SIGN_NAMES[word] for word in words if word in _SIGN_NAMES]
+    if len(named_signs) > 1:
+        return None
+    if named_signs:
+        sign = named_signs[0]
+    elif user_sign is not None:
+        sign = user_sign
+    else:
+        return None
+
+    start, end = period_window(period, today)
+    return HoroscopeIntent(period, sign, start, end, locale or settings.horoscope_default_locale)
+
+
+def horoscope_messages(intent: HoroscopeIntent) -> list:
+    """Chat messages for a horoscope; they depend only on sign, period and locale."""
+    request = (
+        f"{intent.period.capitalize()} horoscope for {intent.sign}, "
+        f"{intent.start.strftime('%B %d, %Y')} - {intent.end.strftime('%B %d, %Y')}."
+    )
+    if intent.locale != settings.horoscope_default_locale:
+        request += f" Write it in the language of the '{intent.locale}' locale."
+    return [
+        {"role": "system", "content": HOROSCOPE_SYSTEM.text},
+        {"role": "user", "content": request},
+    ]
+
+
+def generate_horoscope_stream(intent: HoroscopeIntent) -> AsyncIterator[str]:
+    """
+    Stream a horoscope for a sign and period from the LLM provider.
+
+    Identical requests in flight at the same time share one upstream stream.
+    """
+    return coalesced_stream(
+        get_llm_provider(),
+        horoscope_messages(intent),
+        model=settings.llm_stream_model,
+        temperature=settings.llm_temperature,
+        max_tokens=settings.llm_max_tokens,
+    )
+
+
+def split_for_streaming(text: str) -> list:
+    """Split cached text into line-sized chunks for SSE replay."""
+    return text.splitlines(keepends=True) or [text]
+
+
+async def horoscope_stream(intent: HoroscopeIntent) -> AsyncIterator[str]:
+    """
+    Serve a horoscope from the response cache, then from the precomputed
+    daily horoscopes, and only generate (and cache) it when neither has it.
+    """
+    cached = await response_cache.get(intent.key)
+    if cached is None and intent.period == "daily":
+        cached = await load_daily_horoscope(get_database(), intent)
+        if cached is not None:
+            await response_cache.set(intent.key, cached, intent.ttl(datetime.utcnow()))
+    if cached is not None:
+        for chunk in split_for_streaming(cached):
+            yield chunk
+        return
+
+    chunks = []
+    async for chunk in generate_horoscope_stream(intent):
+        chunks.append(chunk)
+        yield chunk
+    await response_cache.set(intent.key, "".join(chunks), intent.ttl(datetime.utcnow()))
+
+
+async def load_daily_horoscope(database, intent: HoroscopeIntent) -> Optional[str]:
+    """Precomputed daily horoscope for the intent's sign, locale and day, if any."""
+    if database is None:
+        return None
+    document = await database.daily_horoscopes.find_one(
+        {
+            "date": intent.start.isoformat(),
+            "sign": intent.sign,
+            "locale": intent.locale,
+            "status": "ready",
+        },
+        {"text": 1},
+    )
+    if document is None:
+        daily_horoscope_lookups.inc(result="miss")
+        return None
+    daily_horoscope_lookups.inc(result="hit")
+    return document["text"]
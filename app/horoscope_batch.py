@@ -0,0 +1,200 @@
+"""
+Off-peak precomputation of daily horoscopes.
+
+Daily horoscopes depend only on sign, locale and day, so instead of asking
+the LLM once per user every morning the job scans active users, groups them
+by (sign, locale) and generates one horoscope per group into the
+``daily_horoscopes`` collection, where horoscope_stream() serves them from.
+
+Run it on a schedule inside the app (DAILY_HOROSCOPE_JOB_ENABLED=True) or
+from cron:
+
+    python -m app.horoscope_batch --date 2024-01-31
+"""
+
+import argparse
+import asyncio
+import logging
+from collections import Counter as GroupCounter
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from .charts import chart_sun_sign
+from .config import settings
+from .database import close_mongo_connection, connect_to_mongo, get_database
+from .horoscope import HoroscopeIntent, generate_horoscope_stream
+from .indexes import bootstrap_indexes
+from .llm import close_llm_connection, connect_to_llm
+from .logs import configure_logging, stop_logging
+from .metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+daily_horoscopes_generated = Counter(
+    "daily_horoscopes_generated_total", "Daily horoscope groups processed by the batch job", ("status",)
+)
+
+USER_PROJECTION = {"birthdate": 1, "locale": 1, "natal_chart.sun_sign": 1}
+
+# A group still "generating" after this long belongs to a run that died
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+async def active_user_groups(database) -> Dict[Tuple[str, str], int]:
+    """Count active users per (sign, locale), streaming the users collection."""
+    groups = GroupCounter()
+    cursor = database.users.find(
+        {"is_active": {"$ne": False}, "birthdate": {"$ne": None}},
+        USER_PROJECTION,
+        batch_size=settings.daily_horoscope_scan_batch_size,
+    )
+    async for user in cursor:
+        # The same sign the chat's horoscope intent picks for this user
+        sign = chart_sun_sign(user.get("natal_chart"), user["birthdate"])
+        locale = user.get("locale") or settings.horoscope_default_locale
+        groups[(sign, locale)] += 1
+    return dict(groups)
+
+
+async def _generate_group(database, day: date, sign: str, locale: str, users: int) -> str:
+    """
+    Claim and generate one group's horoscope.
+
+    The claim is an insert on the unique (date, sign, locale) index, so
+    concurrent runs (several workers, or a retry) never generate a group twice.
+    Its `claimed_at` is the claim token: releasing or completing the group only
+    matches while it is ours, not after another run took a stale claim over.
+    """
+    key = {"date": day.isoformat(), "sign": sign, "locale": locale}
+    now = datetime.utcnow()
+    try:
+        await database.daily_horoscopes.insert_one({
+            **key,
+            "status": "generating",
+            "users": users,
+            "claimed_at": now,
+            "expires_at": datetime.combine(day, datetime.min.time())
+            + timedelta(days=settings.daily_horoscope_retention_days),
+        })
+    except DuplicateKeyError:
+        # Take over a claim left behind by a run that died mid-generation
+        stale = await database.daily_horoscopes.update_one(
+            {**key, "status": "generating", "claimed_at": {"$lt": now - CLAIM_TIMEOUT}},
+            {"$set": {"claimed_at": now, "users": users}},
+        )
+        if stale.modified_count == 0:
+            return "skipped"
+
+    claim = {**key, "status": "generating", "claimed_at": now}
+    intent = HoroscopeIntent("daily", sign, day, day, locale)
+    try:
+        text = "".join([chunk async for chunk in generate_horoscope_stream(intent)])
+    except Exception as e:
+        # Release the claim so the next run retries this group
+        await database.daily_horoscopes.delete_one(claim)
+        logger.warning("Daily horoscope %s/%s for %s failed: %s", sign, locale, day, e)
+        return "failed"
+
+    result = await database.daily_horoscopes.update_one(claim, {"$set": {
+        "status": "ready",
+        "text": text,
+        "model": settings.llm_stream_model,
+        "generated_at": datetime.utcnow(),
+    }})
+    if result.matched_count == 0:
+        logger.warning("Daily horoscope %s/%s for %s was taken over by another run", sign, locale, day)
+        return "skipped"
+    return "generated"
+
+
+async def generate_daily_horoscopes(
+    database,
+    day: date,
+    concurrency: Optional[int] = None,
+) -> Dict[str, int]:
+    """Generate the day's horoscope for every (sign, locale) with active users."""
+    groups = await active_user_groups(database)
+    semaphore = asyncio.Semaphore(concurrency or settings.daily_horoscope_concurrency)
+
+    async def run(group, users):
+        async with semaphore:
+            return await _generate_group(database, day, *group, users)
+
+    results = await asyncio.gather(*(run(group, users) for group, users in groups.items()))
+    summary = GroupCounter(results)
+    for status, count in summary.items():
+        daily_horoscopes_generated.inc(count, status=status)
+    logger.info(
+        "Daily horoscopes for %s: %d groups covering %d users, %s",
+        day, len(groups), sum(groups.values()),
+        ", ".join(f"{count} {status}" for status, count in sorted(summary.items())),
+    )
+    return dict(summary)
+
+
+def seconds_until_next_run(now: datetime) -> float:
+    run_at = now.replace(hour=settings.daily_horoscope_job_hour_utc, minute=0, second=0, microsecond=0)
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    return (run_at - now).total_seconds()
+
+
+class DailyHoroscopeJob:
+    task: Optional[asyncio.Task] = None
+
+
+daily_horoscope_job = DailyHoroscopeJob()
+
+
+async def _run_schedule():
+    # Catch up on startup (already generated groups are skipped), then daily
+    while True:
+        try:
+            await generate_daily_horoscopes(get_database(), datetime.utcnow().date())
+        except Exception as e:
+            logger.exception("Daily horoscope job failed: %s", e)
+        await asyncio.sleep(seconds_until_next_run(datetime.utcnow()))
+
+
+async def start_daily_horoscope_job():
+    """Schedule the daily horoscope job, if enabled."""
+    if settings.daily_horoscope_job_enabled:
+        daily_horoscope_job.task = asyncio.create_task(_run_schedule())
+
+
+async def stop_daily_horoscope_job():
+    """Cancel the scheduled job."""
+    task, daily_horoscope_job.task = daily_horoscope_job.task, None
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+async def _main(day: date, concurrency: Optional[int]):
+    await connect_to_mongo()
+    await bootstrap_indexes()
+    await connect_to_llm()
+    try:
+        await generate_daily_horoscopes(get_database(), day, concurrency)
+    finally:
+        await close_llm_connection()
+        await close_mongo_connection()
+        await stop_logging()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute daily horoscopes for active users.")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="day to generate (UTC today)")
+    parser.add_argument("--concurrency", type=int, default=None)
+    args = parser.parse_args()
+    configure_logging()
+    asyncio.run(_main(args.date or datetime.utcnow().date(), args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import logging
+from typing import Dict, List
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from .config import settings
+from .database import db, get_database
+
+logger = logging.getLogger(__name__)
+
+
+# Indexes every collection needs, keyed by collection name.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "chat_messages": [
+        # Answered history: {"user_id", "response": {"$exists": True}} sorted by created_at
+        IndexModel(
+            [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="user_answered_history",
+            partialFilterExpression={"response": {"$exists": True}},
+        ),
+        # Recent context for /chat/send, which includes unanswered messages
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_history"),
+    ],
+    "daily_horoscopes": [
+        # One precomputed horoscope per day, sign and locale; also the batch job's claim
+        IndexModel(
+            [("date", ASCENDING), ("sign", ASCENDING), ("locale", ASCENDING)],
+            name="date_sign_locale_unique",
+            unique=True,
+        ),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Hot queries whose plans are reported at startup: (label, collection, filter, sort)
+HOT_QUERIES = [
+    ("login/auth lookup", "users", {"email": "explain@example.com"}, None),
+    (
+        "chat history",
+        "chat_messages",
+        {"user_id": "explain", "response": {"$exists": True}},
+        [("created_at", DESCENDING)],
+    ),
+    ("chat context", "chat_messages", {"user_id": "explain"}, [("created_at", DESCENDING)]),
+    (
+        "daily horoscope",
+        "daily_horoscopes",
+        {"date": "2000-01-01", "sign": "Aries", "locale": "en", "status": "ready"},
+        None,
+    ),
+]
+
+_OPTION_KEYS = ("unique", "partialFilterExpression", "expireAfterSeconds", "sparse")
+
+
+def _same_options(existing: dict, spec: dict) -> bool:
+    return all(existing.get(key) == spec.get(key) for key in _OPTION_KEYS)
+
+
+async def ensure_indexes(database) -> Dict[str, str]:
+    """
+    Create missing indexes and verify existing ones.
+
+    Idempotent: an index that already exists with the same keys and options is
+    left alone, and a conflicting definition is reported rather than dropped.
+    """
+    report = {}
+    for collection_name, models in INDEXES.items():
+        collection = database[collection_name]
+        existing = await collection.index_information()
+        by_key = {tuple(info["key"]): name for name, info in existing.items()}
+
+        for model in models:
+            spec = model.document
+            name = spec["name"]
+            key = tuple(spec["key"].items())
+            label = f"{collection_name}.{name}"
+
+            current_name = name if name in existing else by_key.get(key)
+            if current_name is not None:
+                current = existing[current_name]
+                if tuple(current["key"]) == key and _same_options(current, spec):
+                    report[label] = "present"
+                else:
+                    report[label] = f"conflict with existing index '{current_name}'"
+                continue
+
+            try:
+                await collection.create_indexes([model])
+                report[label] = "created"
+            except OperationFailure as e:
+                report[label] = f"failed: {e}"
+    return report
+
+
+def _plan_stages(plan: dict) -> List[str]:
+    """Flatten a winning plan into 'STAGE(index)' strings, outermost first."""
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        if plan.get("indexName"):
+            stage = f"{stage}({plan['indexName']})"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return stages
+
+
+async def explain_hot_queries(database) -> Dict[str, str]:
+    """Return the winning plan of each hot query."""
+    plans = {}
+    for label, collection_name, query, sort in HOT_QUERIES:
+        cursor = database[collection_name].find(query).limit(50)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+        winning = explanation.get("queryPlanner", {}).get("winningPlan", {})
+        winning = winning.get("queryPlan", winning)
+        plans[label] = " <- ".join(_plan_stages(winning))
+    return plans
+
+
+async def bootstrap_indexes():
+    """Ensure indexes at startup and optionally report hot query plans."""
+    if not settings.mongo_ensure_indexes:
+        return
+    database = get_database()
+    report = await ensure_indexes(database)
+    for label, state in report.items():
+        logger.info("Index %s: %s", label, state)
+    db.indexes_ready = all(state in ("present", "created") for state in report.values())
+
+    if settings.mongo_explain_hot_queries:
+        for label, plan in (await explain_hot_queries(database)).items():
+            logger.info("Query plan [%s]: %s", label, plan)
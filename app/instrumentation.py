@@ -0,0 +1,112 @@
+"""
+Request and hot-path latency instrumentation.
+
+MetricsMiddleware resolves the route template of every request before it
+runs and keeps it in a context variable, so stage timings recorded deep in
+the call stack (and in tasks the request starts, like a detached stream
+generation) carry the route label without threading it through every call.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+
+from starlette.routing import Match
+
+from .metrics import Histogram
+
+# Route label of work that doesn't belong to a request (startup, scheduled jobs)
+NO_ROUTE = "background"
+
+current_route: ContextVar[str] = ContextVar("current_route", default=NO_ROUTE)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, including streamed bodies", ("method", "route", "status")
+)
+stage_duration = Histogram("stage_duration_seconds", "Latency of hot-path stages", ("route", "stage"))
+llm_time_to_first_token = Histogram(
+    "llm_time_to_first_token_seconds", "Time from starting an LLM stream to its first chunk", ("route", "model")
+)
+llm_stream_duration = Histogram("llm_stream_duration_seconds", "Total LLM stream duration", ("route", "model"))
+llm_tokens_per_second = Histogram(
+    "llm_tokens_per_second",
+    "LLM output rate after the first chunk (one chunk is about one token)",
+    ("route", "model"),
+    buckets=(5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500),
+)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a hot-path stage of the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_duration.observe(time.perf_counter() - started, route=current_route.get(), stage=name)
+
+
+async def measured_stream(chunks: AsyncIterator[str], model: Optional[str]) -> AsyncIterator[str]:
+    """Pass an LLM stream through, recording time to first chunk, output rate and duration."""
+    route = current_route.get()
+    model = model or "default"
+    started = time.perf_counter()
+    first_at = None
+    count = 0
+    try:
+        async for chunk in chunks:
+            if first_at is None:
+                first_at = time.perf_counter()
+                llm_time_to_first_token.observe(first_at - started, route=route, model=model)
+            count += 1
+            yield chunk
+    finally:
+        finished = time.perf_counter()
+        llm_stream_duration.observe(finished - started, route=route, model=model)
+        if count > 1 and finished > first_at:
+            llm_tokens_per_second.observe((count - 1) / (finished - first_at), route=route, model=model)
+
+
+def route_template(scope) -> str:
+    """The path template of the route a request will hit, to keep label cardinality bounded."""
+    app = scope.get("app")
+    partial = None
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency by method, route and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+        token = current_route.set(route)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_request_duration.observe(
+                time.perf_counter() - started, method=scope["method"], route=route, status=str(status)
+            )
+            current_route.reset(token)
@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+import logging
+import random
+from typing import AsyncIterator, Dict, List, Optional, Type
+
+import httpx
+from openai import AsyncOpenAI
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LLMProviderError(Exception):
+    """Raised when a provider fails to produce a completion."""
+
+
+class LLMProvider(ABC):
+    """Interface the chat pipeline uses to talk to a language model."""
+
+    name = "base"
+
+    async def connect(self):
+        """Open any connections the provider needs."""
+
+    async def close(self):
+        """Release the provider's connections."""
+
+    async def ping(self):
+        """Raise if the provider can't be reached; also opens a pooled connection."""
+
+    @abstractmethod
+    async def complete(self, prompt: str, model: Optional[str] = None) -> str:
+        """Return a full completion for a single prompt."""
+
+    @abstractmethod
+    def stream(self, messages: List[dict], model: Optional[str] = None, **params) -> AsyncIterator[str]:
+        """Yield completion text chunks for a list of chat messages."""
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI-compatible provider backed by a pooled async HTTP client."""
+
+    name = "openai"
+
+    def __init__(self):
+        self.client: AsyncOpenAI = None
+
+    async def connect(self):
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                keepalive_expiry=settings.llm_keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(settings.llm_timeout, connect=settings.llm_connect_timeout),
+        )
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            http_client=http_client,
+            max_retries=settings.llm_max_retries,
+        )
+
+    async def close(self):
+        if self.client:
+            await self.client.close()
+            self.client = None
+
+    async def ping(self):
+        # Metadata of the streaming model: cheap, unbilled, and proves the key can use it
+        client = self.client.with_options(max_retries=0, timeout=settings.health_check_timeout_seconds)
+        await client.models.retrieve(settings.llm_stream_model)
+
+    async def complete(self, prompt: str, model: Optional[str] = None) -> str:
+        response = await self.client.responses.create(
+            model=model or settings.llm_chat_model,
+            input=prompt
+        )
+        return response.output_text
+
+    async def stream(self, messages: List[dict], model: Optional[str] = None, **params) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=model or settings.llm_stream_model,
+            messages=messages,
+            stream=True,
+            **params
+        )
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content is not None:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Closing the connection right away is what stops a cancelled generation upstream
+            await stream.close()
+
+
+class LocalProvider(LLMProvider):
+    """
+    Deterministic offline provider for load testing.
+
+    The generated text depends only on the seed and the prompt, while
+    time-to-first-token, token rate and failure rate come from settings.
+    """
+
+    name = "local"
+
+    VOCABULARY = (
+        "The", "stars", "align", "for", "your", "sign", "today", "and", "Venus",
+        "brings", "calm", "to", "relationships", "while", "Mars", "favours", "bold",
+        "moves", "at", "work", "Trust", "intuition", "around", "money", "matters",
+        "as", "the", "Moon", "moves", "through", "your", "house", "of", "growth",
+    )
+
+    def __init__(self):
+        self.ttft = settings.local_llm_ttft_ms / 1000
+        self.token_interval = 1 / settings.local_llm_tokens_per_second if settings.local_llm_tokens_per_second > 0 else 0
+        self.failure_rate = settings.local_llm_failure_rate
+        self.response_tokens = settings.local_llm_response_tokens
+        self.seed = settings.local_llm_seed
+        # Failures follow one seeded sequence, so a benchmark run can be repeated exactly
+        self._failures = random.Random(self.seed)
+
+    def _rng(self, text: str) -> random.Random:
+        digest = hashlib.sha256(f"{self.seed}:{text}".encode()).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _tokens(self, text: str, max_tokens: Optional[int] = None) -> List[str]:
+        rng = self._rng(text)
+        count = min(self.response_tokens, max_tokens or self.response_tokens)
+        return [rng.choice(self.VOCABULARY) + " " for _ in range(count)]
+
+    def _failure_point(self, token_count: int) -> Optional[int]:
+        if self.failure_rate <= 0 or self._failures.random() >= self.failure_rate:
+            return None
+        return self._failures.randint(0, token_count)
+
+    async def complete(self, prompt: str, model: Optional[str] = None) -> str:
+        tokens = self._tokens(prompt)
+        if self._failure_point(len(tokens)) is not None:
+            await asyncio.sleep(self.ttft)
+            raise LLMProviderError("Local provider simulated failure")
+        await asyncio.sleep(self.ttft + self.token_interval * len(tokens))
+        return "".join(tokens).rstrip()
+
+    async def stream(self, messages: List[dict], model: Optional[str] = None, **params) -> AsyncIterator[str]:
+        tokens = self._tokens(messages[-1]["content"] if messages else "", params.get("max_tokens"))
+        fail_at = self._failure_point(len(tokens))
+        await asyncio.sleep(self.ttft)
+        for index, token in enumerate(tokens):
+            if index == fail_at:
+                raise LLMProviderError("Local provider simulated failure")
+            yield token
+            await asyncio.sleep(self.token_interval)
+
+
+PROVIDERS: Dict[str, Type[LLMProvider]] = {
+    OpenAIProvider.name: OpenAIProvider,
+    LocalProvider.name: LocalProvider,
+}
+
+
+class LLM:
+    provider: LLMProvider = None
+
+
+llm = LLM()
+
+
+async def connect_to_llm():
+    """Create the configured LLM provider."""
+    provider_class = PROVIDERS.get(settings.llm_provider)
+    if provider_class is None:
+        raise ValueError(f"Unknown LLM provider: {settings.llm_provider}")
+    llm.provider = provider_class()
+    await llm.provider.connect()
+    logger.info("Connected to LLM provider (%s).", llm.provider.name)
+
+
+async def close_llm_connection():
+    """Close the LLM provider and its connection pool."""
+    if llm.provider:
+        await llm.provider.close()
+        llm.provider = None
+        logger.info("Disconnected from LLM provider.")
+
+
+def get_llm_provider() -> LLMProvider:
+    """Get the configured LLM provider."""
+    return llm.provider
@@ -0,0 +1,45 @@
+"""
+Logging setup.
+
+Log records are put on a queue and written to stderr by a listener thread,
+so a slow terminal or log shipper never blocks the event loop.
+"""
+
+import logging
+import logging.handlers
+import queue
+import sys
+
+from .config import settings
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+class LogQueue:
+    listener: logging.handlers.QueueListener = None
+
+
+log_queue = LogQueue()
+
+
+def configure_logging():
+    """Route the root logger through a queue; safe to call more than once."""
+    if log_queue.listener is not None:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    records = queue.SimpleQueue()
+
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(records)]
+    root.setLevel(settings.log_level.upper())
+
+    log_queue.listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    log_queue.listener.start()
+
+
+async def stop_logging():
+    """Flush queued records and stop the listener thread."""
+    listener, log_queue.listener = log_queue.listener, None
+    if listener is not None:
+        listener.stop()
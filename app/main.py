@@ -1,14 +1,32 @@
-from fastapi import FastAPI
+import secrets
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .database import connect_to_mongo, close_mongo_connection
-from .routers import auth, users, chat
+from .indexes import bootstrap_indexes
+from .llm import connect_to_llm, close_llm_connection
+from .cache import connect_to_cache, close_cache
+from .ratelimit import connect_rate_limiter, close_rate_limiter
+from .metrics import render_metrics
+from .instrumentation import MetricsMiddleware
+from .logs import configure_logging, stop_logging
+from .auth import shutdown_password_pool
+from .horoscope_batch import start_daily_horoscope_job, stop_daily_horoscope_job
+from .health import drain, warm_up
+from .routers import auth, users, chat, geo, health
 from .config import settings
+from .serialization import DefaultJSONResponse
+
+configure_logging()
 
 app = FastAPI(
     title=settings.app_name,
     description="Astrology Platform API with user registration, authentication, and chat functionality",
     version="1.0.0",
-    debug=settings.debug
+    debug=settings.debug,
+    default_response_class=DefaultJSONResponse,
 )
 
 # CORS middleware
@@ -18,16 +36,51 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Before-Cursor", "X-After-Cursor", "X-Has-More", "Retry-After"],
 )
 
+# Request latency by route; also labels the stage timings recorded while handling it
+app.add_middleware(MetricsMiddleware)
+
+# In-flight streams finish (or are persisted as aborted) before any connection closes
+app.add_event_handler("shutdown", drain)
+
 # Database events
 app.add_event_handler("startup", connect_to_mongo)
+app.add_event_handler("startup", bootstrap_indexes)
 app.add_event_handler("shutdown", close_mongo_connection)
 
+# LLM client events
+app.add_event_handler("startup", connect_to_llm)
+app.add_event_handler("shutdown", close_llm_connection)
+
+# User cache events
+app.add_event_handler("startup", connect_to_cache)
+app.add_event_handler("shutdown", close_cache)
+
+# Chat admission control
+app.add_event_handler("startup", connect_rate_limiter)
+app.add_event_handler("shutdown", close_rate_limiter)
+
+# Password hashing pool
+app.add_event_handler("shutdown", shutdown_password_pool)
+
+# Warm-up: prime pools and lazily loaded data before readiness turns green
+app.add_event_handler("startup", warm_up)
+
+# Off-peak daily horoscope precomputation
+app.add_event_handler("startup", start_daily_horoscope_job)
+app.add_event_handler("shutdown", stop_daily_horoscope_job)
+
+# Queued log records are flushed last, after every other shutdown handler has logged
+app.add_event_handler("shutdown", stop_logging)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(chat.router)
+app.include_router(geo.router)
+app.include_router(health.router)
 
 
 @app.get("/")
@@ -40,7 +93,15 @@ async def root():
     }
 
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy", "service": settings.app_name}
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """Metrics in the Prometheus text format (bearer token when METRICS_TOKEN is set)."""
+    if settings.metrics_token and not secrets.compare_digest(
+        (authorization or "").encode(), f"Bearer {settings.metrics_token}".encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return render_metrics()
@@ -2,6 +2,7 @@ from .user import (
     UserBase,
     UserCreate,
     UserUpdate,
+    UserFields,
     UserInDB,
     UserResponse,
     UserLogin,
@@ -17,6 +18,8 @@ from .chat import (
     ChatSession
 )
 
+from .geo import PlaceResponse
+
 __all__ = [
     "UserBase",
     "UserCreate", 
@@ -30,5 +33,6 @@ __all__ = [
     "ChatMessage",
     "ChatMessageCreate",
     "ChatMessageResponse",
-    "ChatSession"
+    "ChatSession",
+    "PlaceResponse"
 ]
@@ -1,7 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional
 from datetime import datetime
-from bson import ObjectId
 from .user import PyObjectId
 
 
@@ -14,8 +13,7 @@ class ChatMessage(BaseModel):
 
     model_config = ConfigDict(
         validate_by_name=True,
-        arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str, datetime: lambda v: v.isoformat() if isinstance(v, datetime) else v}
+        arbitrary_types_allowed=True
     )
 
 
@@ -30,10 +28,6 @@ class ChatMessageResponse(BaseModel):
     is_user_message: bool
     created_at: datetime
 
-    model_config = ConfigDict(
-        json_encoders={datetime: lambda v: v.isoformat() if isinstance(v, datetime) else v}
-    )
-
 
 class ChatSession(BaseModel):
     id: str = Field(alias="_id")
@@ -44,6 +38,5 @@ class ChatSession(BaseModel):
 
     model_config = ConfigDict(
         validate_by_name=True,
-        arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str, datetime: lambda v: v.isoformat() if isinstance(v, datetime) else v}
+        arbitrary_types_allowed=True
     )
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+
+class PlaceResponse(BaseModel):
+    name: str
+    label: str
+    country: str
+    latitude: float
+    longitude: float
+    timezone: str
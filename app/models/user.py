@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field, validator, ConfigDict
+from pydantic import BaseModel, EmailStr, Field, field_validator, ConfigDict
 from typing import Optional
 from datetime import datetime, date
 from bson import ObjectId
@@ -28,7 +28,8 @@ class UserBase(BaseModel):
     birthtime: str = Field(..., description="Time of birth (HH:MM format)")
     birth_location: str = Field(..., min_length=2, max_length=200, description="Location of birth")
     
-    @validator('birthtime')
+    @field_validator('birthtime')
+    @classmethod
     def validate_birthtime(cls, v):
         try:
             datetime.strptime(v, "%H:%M %p")
@@ -49,7 +50,16 @@ class UserUpdate(BaseModel):
     birthtime: Optional[str] = None
     birth_location: Optional[str] = Field(None, min_length=2, max_length=200)
     
-    @validator('birthtime')
+    @field_validator('birthdate', 'birthtime', 'birth_location')
+    @classmethod
+    def reject_null_birth_fields(cls, v):
+        """Birth fields may be omitted but not cleared: the natal chart needs them."""
+        if v is None:
+            raise ValueError("Birth data cannot be removed")
+        return v
+    
+    @field_validator('birthtime')
+    @classmethod
     def validate_birthtime(cls, v):
         if v is not None:
             try:
@@ -60,37 +70,57 @@ class UserUpdate(BaseModel):
         return v
 
 
-class UserInDB(UserBase):
+class UserFields(BaseModel):
+    """
+    Profile fields of a stored user. UserCreate and UserUpdate validated them
+    on the way in, so models of stored users only declare their types.
+    """
+    name: str
+    email: str
+    phone_number: str
+    birthdate: date
+    birthtime: str
+    birth_location: str
+
+    @classmethod
+    def from_mongo(cls, doc: dict):
+        """Build from a `users` document; only the field types are checked."""
+        values = dict(doc, _id=str(doc["_id"]))
+        # Stored as a datetime, since BSON has no date type
+        if isinstance(values.get("birthdate"), datetime):
+            values["birthdate"] = values["birthdate"].date()
+        return cls.model_validate(values)
+
+
+class UserInDB(UserFields):
     id: str = Field(alias="_id")
     hashed_password: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     is_active: bool = True
+    natal_chart: Optional[dict] = None
 
     model_config = ConfigDict(
         validate_by_name=True,
-        arbitrary_types_allowed=True,
-        json_encoders={ObjectId: str}
+        arbitrary_types_allowed=True
     )
 
 
-class UserResponse(UserBase):
+class UserResponse(UserFields):
     id: str = Field(alias="_id")
     created_at: datetime
     updated_at: datetime
     is_active: bool
+    natal_chart: Optional[dict] = None
 
     model_config = ConfigDict(
-        validate_by_name=True,
-        json_encoders={ObjectId: str, datetime: lambda v: v.isoformat() if isinstance(v, datetime) else v}
+        validate_by_name=True
     )
     
-    @validator('birthdate', pre=True)
-    def convert_birthdate(cls, v):
-        """Convert datetime to date for response"""
-        if isinstance(v, datetime):
-            return v.date()
-        return v
+    @classmethod
+    def from_user(cls, user: UserInDB) -> "UserResponse":
+        """The public view of an already loaded user."""
+        return cls.model_validate(user.model_dump(by_alias=True))
 
 
 class UserLogin(BaseModel):
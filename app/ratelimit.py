@@ -0,0 +1,211 @@
+"""
+Admission control for chat generations.
+
+Two limits protect the LLM and the worker:
+
+* a token bucket per user: CHAT_RATE_LIMIT_BURST requests at once, refilled
+  at CHAT_RATE_LIMIT_PER_MINUTE. The buckets live in this process by default,
+  or in Redis (CHAT_RATE_LIMIT_BACKEND=redis) so every worker shares them
+* a cap on generations in flight in this worker
+  (CHAT_MAX_CONCURRENT_GENERATIONS). Requests over the cap queue for up to
+  CHAT_ADMISSION_TIMEOUT_SECONDS
+
+A request that hits either limit is rejected with 429 and a Retry-After.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Optional, Tuple
+
+from .cache import TTLCache, redis
+from .config import settings
+from .metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+chat_admissions = Counter("chat_admissions_total", "Chat generation admission decisions", ("result",))
+chat_generations_in_flight = Gauge("chat_generations_in_flight", "Chat generations holding a slot")
+chat_generations_waiting = Gauge("chat_generations_waiting", "Chat requests queued for a generation slot")
+
+
+def take_token(tokens: float, updated: float, now: float, rate: float, burst: float) -> Tuple[float, float]:
+    """
+    Refill a bucket to `now` and take one token.
+
+    Returns the tokens left and the seconds until a token is available
+    (0 when one was taken).
+    """
+    tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryRateLimitBackend:
+    """Per-process token buckets."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        # An idle bucket is full again after burst / rate seconds, so it can be dropped
+        self.buckets = TTLCache(settings.chat_rate_limit_max_users, burst / rate)
+
+    async def take(self, key: str) -> float:
+        now = time.monotonic()
+        tokens, updated = self.buckets.get(key) or (self.burst, now)
+        tokens, retry_after = take_token(tokens, updated, now, self.rate, self.burst)
+        self.buckets.set(key, (tokens, now))
+        return retry_after
+
+    async def close(self):
+        self.buckets.clear()
+
+
+# Same arithmetic as take_token(), atomic on the Redis server
+TAKE_TOKEN_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    """Token buckets shared by every worker through Redis."""
+
+    prefix = "ratelimit:chat:"
+
+    def __init__(self, rate: float, burst: float):
+        if redis is None:
+            raise RuntimeError("CHAT_RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        self.rate = rate
+        self.burst = burst
+        self.client = redis.from_url(settings.redis_url, decode_responses=True)
+        self.script = self.client.register_script(TAKE_TOKEN_SCRIPT)
+
+    async def take(self, key: str) -> float:
+        # Wall-clock time, since the buckets are shared between hosts
+        retry_after = await self.script(keys=[self.prefix + key], args=[self.rate, self.burst, time.time()])
+        return float(retry_after)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+RATE_LIMIT_BACKENDS = {
+    "memory": MemoryRateLimitBackend,
+    "redis": RedisRateLimitBackend,
+}
+
+
+class AdmissionRejected(Exception):
+    """A request over the rate limit or the concurrency cap."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class Admission:
+    """A generation slot; release it when the generation ends (safe to call twice)."""
+
+    def __init__(self, semaphore: Optional[asyncio.Semaphore]):
+        self._semaphore = semaphore
+        if semaphore is not None:
+            chat_generations_in_flight.inc()
+
+    def release(self):
+        semaphore, self._semaphore = self._semaphore, None
+        if semaphore is not None:
+            semaphore.release()
+            chat_generations_in_flight.dec()
+
+
+class AdmissionControl:
+    """Per-user rate limit plus the per-worker cap on in-flight generations."""
+
+    backend = None
+    semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _check_rate(self, user_id: str):
+        if self.backend is None:
+            return
+        try:
+            retry_after = await self.backend.take(user_id)
+        except Exception as e:
+            # A rate limit store outage must not take the chat down with it
+            logger.warning("Rate limit check failed, admitting request: %s", e)
+            return
+        if retry_after > 0:
+            chat_admissions.inc(result="rate_limited")
+            raise AdmissionRejected("rate_limited", retry_after)
+
+    async def admit(self, user_id: str) -> Admission:
+        """
+        Take a token from the user's bucket, then wait for a generation slot.
+
+        Raises AdmissionRejected when the bucket is empty or no slot frees up
+        within CHAT_ADMISSION_TIMEOUT_SECONDS.
+        """
+        await self._check_rate(user_id)
+        if self.semaphore is None:
+            chat_admissions.inc(result="admitted")
+            return Admission(None)
+
+        if self.semaphore.locked():
+            chat_generations_waiting.inc()
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), settings.chat_admission_timeout_seconds)
+            except asyncio.TimeoutError:
+                chat_admissions.inc(result="overloaded")
+                raise AdmissionRejected("overloaded", settings.chat_admission_timeout_seconds)
+            finally:
+                chat_generations_waiting.dec()
+            chat_admissions.inc(result="queued")
+        else:
+            await self.semaphore.acquire()
+            chat_admissions.inc(result="admitted")
+        return Admission(self.semaphore)
+
+
+admission_control = AdmissionControl()
+
+
+async def connect_rate_limiter():
+    """Create the configured rate limit backend and the generation slots."""
+    if settings.chat_rate_limit_enabled:
+        backend_class = RATE_LIMIT_BACKENDS.get(settings.chat_rate_limit_backend)
+        if backend_class is None:
+            raise ValueError(f"Unknown rate limit backend: {settings.chat_rate_limit_backend}")
+        admission_control.backend = backend_class(
+            settings.chat_rate_limit_per_minute / 60, settings.chat_rate_limit_burst
+        )
+    if settings.chat_max_concurrent_generations > 0:
+        admission_control.semaphore = asyncio.Semaphore(settings.chat_max_concurrent_generations)
+
+
+async def close_rate_limiter():
+    """Close the rate limit backend."""
+    if admission_control.backend is not None:
+        await admission_control.backend.close()
+        admission_control.backend = None
+    admission_control.semaphore = None
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from ..database import get_database
-from ..auth import verify_password, get_password_hash, create_access_token
+from ..auth import verify_password_async, get_password_hash_async, create_access_token
 from ..models.user import UserCreate, UserLogin, UserResponse, Token
 from ..dependencies import get_current_active_user
+from ..charts import compute_user_chart
 from datetime import datetime, date
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -26,11 +28,16 @@ async def register(
     
     # Create user document
     user_dict = user_data.dict()
-    user_dict["hashed_password"] = get_password_hash(user_data.password)
+    user_dict["hashed_password"] = await get_password_hash_async(user_data.password)
     user_dict["created_at"] = datetime.utcnow()
     user_dict["updated_at"] = datetime.utcnow()
     user_dict["is_active"] = True
     
+    # Compute the natal chart once; chat requests read it from the user document
+    user_dict["natal_chart"] = compute_user_chart(
+        user_data.birthdate, user_data.birthtime, user_data.birth_location
+    )
+    
     # Convert birthdate from date to datetime for MongoDB compatibility
     if isinstance(user_dict["birthdate"], date):
         user_dict["birthdate"] = datetime.combine(user_dict["birthdate"], datetime.min.time())
@@ -39,10 +46,16 @@ async def register(
     del user_dict["password"]
     
     # Insert user into database
-    result = await database.users.insert_one(user_dict)
-    user_dict["_id"] = str(result.inserted_id)
+    try:
+        result = await database.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    user_dict["_id"] = result.inserted_id
     
-    return UserResponse(**user_dict)
+    return UserResponse.from_mongo(user_dict)
 
 
 @router.post("/login", response_model=Token)
@@ -61,7 +74,7 @@ async def login(
         )
     
     # Verify password
-    if not verify_password(user_credentials.password, user["hashed_password"]):
+    if not await verify_password_async(user_credentials.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -86,5 +99,4 @@ async def get_current_user_info(
     current_user = Depends(get_current_active_user)
 ):
     """Get current user information."""
-    print(current_user)
-    return current_user
+    return UserResponse.from_user(current_user)
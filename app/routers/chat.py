@@ -1,19 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
 from fastapi.responses import StreamingResponse
-from typing import List
-import json
+from typing import List, Optional
+import asyncio
+import base64
+import logging
+import zlib
 import time
 from ..models.chat import ChatMessageCreate, ChatMessageResponse, ChatMessage
 from ..models.user import UserResponse
-from ..dependencies import get_current_user
-from ..database import get_database
+from ..dependencies import admit_chat_generation, get_current_user
+from ..database import chat_history, chat_writes, get_database
+from ..llm import get_llm_provider
+from ..coalescing import coalesced_stream
+from ..astrology import chart_facts, current_positions, natal_chart
+from ..charts import chart_sun_sign, ensure_natal_chart
+from ..context import (
+    ConversationContext, build_context, context_messages, count_tokens, format_turns, update_summary_safely
+)
+from ..prompts import CHAT_SYSTEM, CHAT_USER_CONTEXT
+from ..horoscope import detect_horoscope_intent, horoscope_stream
+from ..instrumentation import stage
+from ..serialization import DefaultJSONResponse, dumps
+from ..streaming import (
+    ChunkWriter, EventEncoder, ResponseStatus, chat_stream_tokens_saved, completion_lengths, run_in_background, sse_events,
+    stream_registry,
+)
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
 import os
 from ..config import settings
 
-from openai import OpenAI
-client = OpenAI(api_key=settings.openai_api_key)
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -25,6 +43,15 @@ async def send_message(
     db = Depends(get_database)
 ):
     """Send a chat message and get AI response"""
+    admission = await admit_chat_generation(current_user)
+    try:
+        return await _send_message(message_data, current_user, db)
+    finally:
+        admission.release()
+
+
+async def _send_message(message_data: ChatMessageCreate, current_user: UserResponse, db) -> ChatMessageResponse:
+    """Persist the user message, generate the response and persist it"""
     
     # Create user message
     user_message = {
@@ -35,18 +62,22 @@ async def send_message(
     }
     
     # Insert user message
-    result = await db.chat_messages.insert_one(user_message)
+    with stage("mongo_insert"):
+        result = await chat_writes(db).insert_one(user_message)
     user_message["_id"] = str(result.inserted_id)
     
-    # Fetch last 10 messages for context
-    cursor = db.chat_messages.find(
-        {"user_id": current_user.id}
-    ).sort("created_at", -1).limit(10)
-    
-    chat_history = await cursor.to_list(length=10)
-    
-    # Generate AI response with chat history
-    ai_response = generate_ai_response(message_data.message, current_user, chat_history)
+    chart = await ensure_natal_chart(current_user, db)
+    user_sign = chart_sun_sign(chart, current_user.birthdate)
+    intent = detect_horoscope_intent(message_data.message, user_sign, user_message["created_at"].date())
+    if intent is not None:
+        # Horoscopes depend only on sign and period, so they come from the response cache
+        ai_response = "".join([chunk async for chunk in horoscope_stream(intent)])
+    else:
+        # Recent turns within the token budget plus the rolling summary
+        context = await build_context(db, current_user.id)
+        
+        # Generate AI response with conversation context
+        ai_response = await generate_ai_response(message_data.message, current_user, context, chart)
     
     # Create AI message
     ai_message = {
@@ -57,10 +88,12 @@ async def send_message(
     }
     
     # Insert AI message
-    await db.chat_messages.update_one(
+    await chat_writes(db).update_one(
         {"_id": ObjectId(user_message["_id"])},
-        {"$set": {"response": ai_response}}
+        {"$set": {"response": ai_response, "response_status": ResponseStatus.COMPLETE}}
     )
+    if intent is None:
+        run_in_background(update_summary_safely(db, current_user.id))
     
     return ChatMessageResponse(
         id=str(user_message["_id"]),
@@ -74,10 +107,29 @@ async def send_message(
 @router.post("/send-stream")
 async def send_message_stream(
     message_data: ChatMessageCreate,
+    request: Request,
     current_user: UserResponse = Depends(get_current_user),
     db = Depends(get_database)
 ):
     """Send a chat message and get AI response via streaming"""
+    admission = await admit_chat_generation(current_user)
+    try:
+        session = await _start_message_stream(message_data, current_user, db)
+    except BaseException:
+        admission.release()
+        raise
+    # The slot is held until the detached generation ends, not the connection
+    session.task.add_done_callback(lambda _: admission.release())
+    
+    return StreamingResponse(
+        sse_events(session, request=request),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+async def _start_message_stream(message_data: ChatMessageCreate, current_user: UserResponse, db):
+    """Persist the user message and start generating the response in the background"""
     
     # Create user message
     user_message = {
@@ -88,325 +140,344 @@ async def send_message_stream(
     }
     
     # Insert user message
-    result = await db.chat_messages.insert_one(user_message)
+    with stage("mongo_insert"):
+        result = await chat_writes(db).insert_one(user_message)
     user_message["_id"] = str(result.inserted_id)
     
-    # Fetch last 10 messages for context
-    cursor = db.chat_messages.find(
-        {"user_id": current_user.id, "response": {"$exists": True}}
-    ).sort("created_at", -1).limit(10)
+    chart = await ensure_natal_chart(current_user, db)
+    user_sign = chart_sun_sign(chart, current_user.birthdate)
+    intent = detect_horoscope_intent(message_data.message, user_sign, user_message["created_at"].date())
+    
+    context = None
+    if intent is None:
+        # Recent turns within the token budget plus the rolling summary
+        context = await build_context(db, current_user.id)
     
-    chat_history = await cursor.to_list(length=10)
+    message_id = user_message["_id"]
+    writer = ChunkWriter(chat_writes(db), result.inserted_id)
+    session = stream_registry.create(message_id, current_user.id)
+    events = EventEncoder(message_id)
     
-    async def generate_stream():
-        """Generate streaming response"""
+    async def generate():
+        """Generate the response in the background, independent of the connection"""
         try:
-            # Generate streaming AI response
-            full_response = ""
-            async for chunk in generate_ai_response_stream(message_data.message, current_user, chat_history):
-                full_response += chunk
-                # time.sleep(1)
-                yield f"data: {json.dumps({'chunk': chunk, 'message_id': str(user_message['_id'])})}\n\n"
+            await writer.start()
+            
+            if intent is not None:
+                # Horoscopes depend only on sign and period, so they come from the response cache
+                chunks = horoscope_stream(intent)
+            else:
+                chunks = generate_ai_response_stream(message_data.message, current_user, context, chart)
+            
+            # Stream the AI response, persisting it as it arrives
+            async for chunk in chunks:
+                await writer.write(chunk)
+                session.publish(events.chunk(chunk))
             
             # Save the complete response to database
-            await db.chat_messages.update_one(
-                {"_id": ObjectId(user_message["_id"])},
-                {"$set": {"response": full_response}}
-            )
+            text = await writer.complete()
+            completion_lengths.record(count_tokens(text))
+            if intent is None:
+                run_in_background(update_summary_safely(db, current_user.id))
             
             # Send end signal
-            yield f"data: {json.dumps({'done': True, 'message_id': str(user_message['_id'])})}\n\n"
+            session.publish(events.done())
             
+        except asyncio.CancelledError:
+            run_in_background(writer.abort())
+            if session.orphaned:
+                # Every client left; a later resume sees the partial answer as aborted
+                chat_stream_tokens_saved.inc(completion_lengths.saved(count_tokens(writer.text)))
+                session.publish(events.aborted())
+            raise
+        
         except Exception as e:
-            error_data = {"error": str(e), "message_id": str(user_message["_id"])}
-            yield f"data: {json.dumps(error_data)}\n\n"
+            await writer.abort()
+            session.publish(events.error(str(e)))
+    
+    stream_registry.start(session, generate())
+    return session
+
+
+@router.get("/stream/{message_id}")
+async def resume_message_stream(
+    message_id: str,
+    request: Request,
+    last_event_id: int = Query(0, ge=0, description="Fallback for clients that cannot set Last-Event-ID"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Resume a streamed response after the given event ID.
+
+    Replays buffered events and then follows the live generation. Sessions
+    live in the worker that started them; once a session has expired use
+    /chat/messages/{message_id}/response instead.
+    """
+    session = stream_registry.get(message_id)
+    if session is None or session.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Stream not found; fetch the persisted response instead"
+        )
+    
+    if last_event_id_header:
+        try:
+            last_event_id = int(last_event_id_header)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid Last-Event-ID"
+            )
     
     return StreamingResponse(
-        generate_stream(),
-        media_type="text/plain",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Content-Type": "text/event-stream",
-        }
+        sse_events(session, last_event_id, request),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
     )
 
 
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
 @router.get("/messages", response_model=List[ChatMessageResponse])
 async def get_chat_history(
     current_user: UserResponse = Depends(get_current_user),
-    limit: int = 50,
+    limit: int = Query(settings.chat_history_page_size, ge=1, description="Page size (capped server-side)"),
+    before: Optional[str] = Query(None, description="Return messages older than this cursor"),
+    after: Optional[str] = Query(None, description="Return messages newer than this cursor"),
     db = Depends(get_database)
 ):
-    """Get chat history for the current user"""
+    """Get a page of chat history for the current user, oldest first"""
+    if before and after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either 'before' or 'after', not both"
+        )
+    limit = min(limit, settings.chat_history_max_page_size)
     
-    cursor = db.chat_messages.find(
-        {"user_id": current_user.id, "response": {"$exists": True}}
-    ).sort("created_at", -1).limit(limit)
+    query = {"user_id": current_user.id, "response": {"$exists": True}}
+    direction = -1
+    if before:
+        query.update(keyset_filter(before, "$lt"))
+    elif after:
+        query.update(keyset_filter(after, "$gt"))
+        direction = 1
     
-    messages = await cursor.to_list(length=limit)
+    # Fetch one extra document to know whether another page exists (served by a secondary when possible)
+    cursor = chat_history(db).find(query, HISTORY_PROJECTION).sort(
+        [("created_at", direction), ("_id", direction)]
+    ).limit(limit + 1)
     
-    # Convert ObjectId to string and reverse to show oldest first
-    chat_messages = []
-    for msg in reversed(messages):
-        chat_messages.append(ChatMessageResponse(
-            id=str(msg["_id"]),
-            response=msg["response"],
-            message=msg["message"],
-            is_user_message=msg["is_user_message"],
-            created_at=msg["created_at"]
-        ))
+    with stage("mongo_find"):
+        messages = await cursor.to_list(length=limit + 1)
+    has_more = len(messages) > limit
+    messages = messages[:limit]
     
-    return chat_messages
-
-
-def generate_ai_response(user_message: str, user: UserResponse, chat_history: list = None) -> str:
-    """Generate AI response based on user message, user profile, and chat history"""
+    # Always return oldest first
+    if direction == -1:
+        messages.reverse()
     
-    # Format birth information as strings
-    name = user.name
-    birthdate_str = user.birthdate.strftime("%B %d, %Y") if user.birthdate else "Not provided"
-    birthtime_str = user.birthtime if user.birthtime else "Not provided"
-    birth_location_str = user.birth_location if user.birth_location else "Not provided"
-
-    # Format chat history for context
-    chat_context = ""
-    if chat_history:
-        # Reverse to show oldest first, then take last 10
-        reversed_history = list(reversed(chat_history))[-10:]
-        chat_context = "\n\n### Previous Conversation Context:\n"
-        for msg in reversed_history:
-            role = "User" if msg["is_user_message"] else "Astrologer"
-            chat_context += f"{role}: {msg['message']}\n"
-
-    prompt = f"""
-        You are an expert astrologer with deep knowledge of Vedic and Western astrology. Your role is to interact with the user and provide accurate astrological insights.
-
-        ### Workflow:
-
-        1. **Greeting Messages**
-
-        * If the user sends a simple greeting (e.g., "Hi", "Hello", "Good morning"), reply politely with a short warm greeting.
-        * Do not ask follow-up questions in this case.
-
-        2. **Horoscope Requests (Daily/Weekly/Monthly/Yearly)**
-
-        * If the user asks for horoscope, daily horoscope, weekly horoscope, monthly horoscope, or yearly horoscope, provide a structured response in the following format:
-
-        ```
-        🌟 [ZODIAC_SIGN] HOROSCOPE - [PERIOD]
-
-         Prediction Period: [Start Date] - [End Date] [Year]
-
-        ⭐ RATINGS:
-        • Health: [X]/5 ⭐
-        • Travel: [X]/5 ⭐
-        • Work: [X]/5 ⭐
-        • Luck: [X]/5 ⭐
-        • Relationship: [X]/5 ⭐
-        • Finance: [X]/5 ⭐
-        • Study: [X]/5 ⭐
-
-        🍀 LUCKY ELEMENTS:
-        • Lucky Number: [Number]
-        • Lucky Color: [Color]
-
-        📖 PREDICTION:
-        [Detailed astrological prediction based on current planetary positions and user's birth chart]
-
-        💡 RECOMMENDATIONS:
-        [Specific recommendations based on astrological analysis]
-        ```
-
-        * Calculate the zodiac sign based on the user's birth date
-        * Provide realistic ratings (1-5 stars) based on planetary positions
-        * Include specific lucky numbers and colors based on astrological calculations
-        * Give detailed predictions and practical recommendations
-
-        3. **Understand the User Input**
-
-        * If the user's message is an astrology-related query, analyze it carefully.
-        * If **birth date, birth time, and birth location are provided**, immediately proceed with a detailed astrological interpretation.
-        * If any of these three details are missing, ask clear and precise follow-up questions to collect the missing information.
-        * If the user's question is very broad (e.g., "tell me about my future"), politely ask them to clarify the specific concern (career, marriage, relationships, finances, etc.).
-
-        4. **Decision Logic**
-
-        * If complete birth details and context are available, generate a **focused and accurate astrological interpretation**.
-        * If essential details are missing, do **not** attempt a partial answer — ask for the exact missing details only.
-        * Do not ask redundant or unnecessary clarifications once all three essentials (birth date, birth time, birth location) are provided.
-
-        5. **Scope Limitation**
-
-        * Stay strictly within the domain of astrology.
-        * ❌ Do not provide medical, legal, psychological, or other non-astrological advice.
-        * ❌ Do not disclose, repeat, or echo the user's personal information (birth details) in the response.
-
-         **Goal:** Help the user gain clarity about their situation using expert astrological analysis based on their provided birth and situational data.
-
-        ---
-
-        **Critical Rules**
-
-        * ❌ Do not answer questions outside astrology.
-        * ❌ Do not provide medical, legal, psychological, or unrelated advice.
-        * ❌ Do not disclose or repeat the user's personal information (birth date, time, or location) in the final response.
-        * ✅ Always keep responses respectful, precise, and astrologically insightful.
-        * ✅ For horoscope requests, always use the structured format above.
-
-        ---
-
-        **User Input Variables:**
-
-        * User Message: {user_message}
-        * User Name: {name}
-        * User Birth Date: {birthdate_str}
-        * User Birth Time: {birthtime_str}
-        * User Birth Location: {birth_location_str}
+    headers = {"X-Has-More": "true" if has_more else "false"}
+    if messages:
+        headers["X-Before-Cursor"] = encode_cursor(messages[0])
+        headers["X-After-Cursor"] = encode_cursor(messages[-1])
+    
+    # Rows from our own collection are encoded directly; response_model still documents them
+    return DefaultJSONResponse([history_row(msg) for msg in messages], headers=headers)
 
-        {chat_context}
-    """
 
-    response = client.responses.create(
-        model="gpt-5",
-        input=prompt
+@router.get("/messages/{message_id}/response")
+async def get_message_response(
+    message_id: str,
+    offset: int = Query(0, ge=0, description="Number of characters the client already has"),
+    current_user: UserResponse = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """Get the persisted (possibly partial) response of a message from an offset"""
+    try:
+        object_id = ObjectId(message_id)
+    except InvalidId:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
+    
+    msg = await db.chat_messages.find_one(
+        {"_id": object_id, "user_id": current_user.id},
+        {"response": 1, "partial_response": 1, "response_status": 1}
     )
-
-    return response.output_text
-
-
-async def generate_ai_response_stream(user_message: str, user: UserResponse, chat_history: list = None):
-    """Generate streaming AI response based on user message, user profile, and chat history"""
+    if msg is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
     
-    # Format birth information as strings
-    name = user.name
-    birthdate_str = user.birthdate.strftime("%B %d, %Y") if user.birthdate else "Not provided"
-    birthtime_str = user.birthtime if user.birthtime else "Not provided"
-    birth_location_str = user.birth_location if user.birth_location else "Not provided"
-
-    # Format chat history for context
-    chat_context = ""
-    if chat_history:
-        # Reverse to show oldest first, then take last 10
-        reversed_history = list(reversed(chat_history))[-10:]
-        chat_context = "\n\n### Previous Conversation Context:\n"
-        for msg in reversed_history:
-            role = "User" if msg["is_user_message"] else "Astrologer"
-            chat_context += f"{role}: {msg['message']}\n"
-
-    prompt = f"""
-        You are an expert astrologer with deep knowledge of Vedic and Western astrology. Your role is to interact with the user and provide accurate astrological insights.
-
-        ### Workflow:
-
-        1. **Greeting Messages**
-
-        * If the user sends a simple greeting (e.g., "Hi", "Hello", "Good morning"), reply politely with a short warm greeting.
-        * Do not ask follow-up questions in this case.
-
-        2. **Horoscope Requests (Daily/Weekly/Monthly/Yearly)**
-
-        * If the user asks for horoscope, daily horoscope, weekly horoscope, monthly horoscope, or yearly horoscope, provide a structured response in the following format:
-
-        ```
-        🌟 [ZODIAC_SIGN] HOROSCOPE - [PERIOD]
-
-         Prediction Period: [Start Date] - [End Date] [Year]
-
-        ⭐ RATINGS:
-        • Health: [X]/5 ⭐
-        • Travel: [X]/5 ⭐
-        • Work: [X]/5 ⭐
-        • Luck: [X]/5 ⭐
-        • Relationship: [X]/5 ⭐
-        • Finance: [X]/5 ⭐
-        • Study: [X]/5 ⭐
-
-        🍀 LUCKY ELEMENTS:
-        • Lucky Number: [Number]
-        • Lucky Color: [Color]
-
-        📖 PREDICTION:
-        [Detailed astrological prediction based on current planetary positions and user's birth chart]
-
-        💡 RECOMMENDATIONS:
-        [Specific recommendations based on astrological analysis]
-        ```
-
-        * Calculate the zodiac sign based on the user's birth date
-        * Provide realistic ratings (1-5 stars) based on planetary positions
-        * Include specific lucky numbers and colors based on astrological calculations
-        * Give detailed predictions and practical recommendations
-
-        3. **Understand the User Input**
-
-        * If the user's message is an astrology-related query, analyze it carefully.
-        * If **birth date, birth time, and birth location are provided**, immediately proceed with a detailed astrological interpretation.
-        * If any of these three details are missing, ask clear and precise follow-up questions to collect the missing information.
-        * If the user's question is very broad (e.g., "tell me about my future"), politely ask them to clarify the specific concern (career, marriage, relationships, finances, etc.).
-
-        4. **Decision Logic**
-
-        * If complete birth details and context are available, generate a **focused and accurate astrological interpretation**.
-        * If essential details are missing, do **not** attempt a partial answer — ask for the exact missing details only.
-        * Do not ask redundant or unnecessary clarifications once all three essentials (birth date, birth time, birth location) are provided.
-
-        5. **Scope Limitation**
+    if "response" in msg:
+        text = msg["response"]
+        response_status = ResponseStatus.COMPLETE
+    else:
+        text = msg.get("partial_response", "")
+        response_status = msg.get("response_status", ResponseStatus.ABORTED)
+    
+    return {
+        "message_id": message_id,
+        "status": response_status,
+        "offset": len(text),
+        "text": text[offset:],
+    }
 
-        * Stay strictly within the domain of astrology.
-        * ❌ Do not provide medical, legal, psychological, or other non-astrological advice.
-        * ❌ Do not disclose, repeat, or echo the user's personal information (birth details) in the response.
 
-         **Goal:** Help the user gain clarity about their situation using expert astrological analysis based on their provided birth and situational data.
+@router.get("/export")
+async def export_chat_history(
+    current_user: UserResponse = Depends(get_current_user),
+    compress: bool = Query(False, description="gzip-compress the NDJSON stream"),
+    db = Depends(get_database)
+):
+    """Export the full chat history of the current user as NDJSON"""
+    
+    cursor = chat_history(db).find(
+        {"user_id": current_user.id}, HISTORY_PROJECTION
+    ).sort([("created_at", 1), ("_id", 1)]).batch_size(settings.chat_export_batch_size)
+    
+    async def generate_lines():
+        """Serialize the cursor in batches so memory stays constant"""
+        batch = []
+        async for msg in cursor:
+            batch.append(dumps(history_row(msg)) + b"\n")
+            if len(batch) >= settings.chat_export_batch_size:
+                yield b"".join(batch)
+                batch = []
+        if batch:
+            yield b"".join(batch)
+    
+    async def generate_gzip():
+        """gzip the NDJSON stream incrementally"""
+        compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+        async for data in generate_lines():
+            compressed = compressor.compress(data)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+    
+    filename = f"chat-history-{current_user.id}.ndjson"
+    headers = {"Cache-Control": "no-cache"}
+    if compress:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}.gz"'
+        return StreamingResponse(generate_gzip(), media_type="application/gzip", headers=headers)
+    headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return StreamingResponse(generate_lines(), media_type="application/x-ndjson", headers=headers)
+
+
+# Fields history_row() reads, for history pages and exports
+HISTORY_PROJECTION = {"message": 1, "response": 1, "is_user_message": 1, "created_at": 1}
+
+
+def history_row(msg: dict) -> dict:
+    """A chat_messages document in the ChatMessageResponse shape, ready to encode."""
+    return {
+        "id": str(msg["_id"]),
+        "message": msg.get("message"),
+        "response": msg.get("response"),
+        "is_user_message": msg.get("is_user_message", True),
+        "created_at": msg["created_at"].isoformat(),
+    }
 
-        ---
 
-        **Critical Rules**
+def encode_cursor(msg: dict) -> str:
+    """Encode a message position as an opaque pagination cursor."""
+    raw = f"{msg['created_at'].isoformat()}|{msg['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
 
-        * ❌ Do not answer questions outside astrology.
-        * ❌ Do not provide medical, legal, psychological, or unrelated advice.
-        * ❌ Do not disclose or repeat the user's personal information (birth date, time, or location) in the final response.
-        * ✅ Always keep responses respectful, precise, and astrologically insightful.
-        * ✅ For horoscope requests, always use the structured format above.
-        * ✅ Do not use user details if user is asking about general astrology.
 
-        ---
+def keyset_filter(cursor: str, operator: str) -> dict:
+    """Build a (created_at, _id) keyset filter from a pagination cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at_str, message_id = raw.split("|")
+        created_at = datetime.fromisoformat(created_at_str)
+        message_id = ObjectId(message_id)
+    except (ValueError, InvalidId, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return {"$or": [
+        {"created_at": {operator: created_at}},
+        {"created_at": created_at, "_id": {operator: message_id}},
+    ]}
+
+
+def compute_astro_facts(user: UserResponse, chart: dict = None) -> str:
+    """Stored natal chart plus today's planetary positions, as prompt facts"""
+    chart = chart or getattr(user, "natal_chart", None)
+    if not chart:
+        if not user.birthdate:
+            return "Not available (birth date not provided)"
+        chart = natal_chart(user.birthdate, user.birthtime)
+    return chart_facts(chart, current_positions(datetime.utcnow()))
+
+
+def user_context_message(user: UserResponse, context: ConversationContext = None, chart: dict = None) -> str:
+    """Per-user and per-day prompt variables, kept out of the static prefix"""
+    return CHAT_USER_CONTEXT.render(
+        name=user.name,
+        birthdate=user.birthdate.strftime("%B %d, %Y") if user.birthdate else "Not provided",
+        birthtime=user.birthtime if user.birthtime else "Not provided",
+        birth_location=user.birth_location if user.birth_location else "Not provided",
+        today=datetime.now().strftime("%B %d, %Y"),
+        astro_facts=compute_astro_facts(user, chart),
+        conversation_summary=context.summary if context and context.summary else "None yet",
+    )
 
-        **User Input Variables:**
 
-        * User Name: {name}
-        * User Birth Date: {birthdate_str}
-        * User Birth Time: {birthtime_str}
-        * User Birth Location: {birth_location_str}
-        * Today's Date: {datetime.now().strftime("%B %d, %Y")}
-    """
+async def generate_ai_response(
+    user_message: str,
+    user: UserResponse,
+    context: ConversationContext = None,
+    chart: dict = None
+) -> str:
+    """Generate AI response based on user message, user profile, and conversation context"""
+    
+    with stage("prompt_build"):
+        # Static instructions first so the prompt prefix is identical for every request
+        sections = [CHAT_SYSTEM.text]
+        if context and context.turns:
+            sections.append(format_turns(context.turns))
+        sections.append(user_context_message(user, context, chart))
+        sections.append(f"**User Message:**\n\n{user_message}")
+        prompt = "\n\n---\n\n".join(sections)
+
+    with stage("llm_complete"):
+        return await get_llm_provider().complete(prompt, model=settings.llm_chat_model)
+
+
+async def generate_ai_response_stream(
+    user_message: str,
+    user: UserResponse,
+    context: ConversationContext = None,
+    chart: dict = None
+):
+    """Generate streaming AI response based on user message, user profile, and conversation context"""
     
-    messages = [{"role": "system", "content": prompt}]
-    if chat_history:
-        # Reverse to show oldest first, then take last 10
-        reversed_history = list(reversed(chat_history))[-5:]
-        for msg in reversed_history:
-            messages.append({"role": "user", "content": msg['message']})
-            messages.append({"role": "assistant", "content": msg['response']})
-    messages.append({"role": "user", "content": user_message})
+    with stage("prompt_build"):
+        # Static system prompt, then the conversation, then the per-user variables:
+        # everything before the trailing messages is reusable from the provider's prompt cache
+        messages = [{"role": "system", "content": CHAT_SYSTEM.text}]
+        if context:
+            # Recent turns verbatim, oldest first, within the token budget
+            messages.extend(context_messages(context))
+        messages.append({"role": "system", "content": user_context_message(user, context, chart)})
+        messages.append({"role": "user", "content": user_message})
     try:
-        stream = client.chat.completions.create(
-            model="gpt-4.1",
-            messages=messages,
-            stream=True,
-            temperature=0.1,
-            max_tokens=1000,
-            top_p=1,
-            frequency_penalty=0,
-            presence_penalty=0,
-            stop=None,
-            n=1,
-        )
-        
-        for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                yield chunk.choices[0].delta.content
+        # Identical prompts in flight (e.g. a double-submitted message) share one upstream stream
+        async for chunk in coalesced_stream(
+            get_llm_provider(),
+            messages,
+            model=settings.llm_stream_model,
+            temperature=settings.llm_temperature,
+            max_tokens=settings.llm_max_tokens,
+        ):
+            yield chunk
                 
     except Exception as e:
-        print(f"Error in streaming response: {e}")
+        logger.warning("Error in streaming response: %s", e)
         yield f"Sorry, I encountered an error: {str(e)}"
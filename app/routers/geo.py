@@ -0,0 +1,15 @@
+from typing import List
+from fastapi import APIRouter, Query
+from ..gazetteer import gazetteer
+from ..models.geo import PlaceResponse
+
+router = APIRouter(prefix="/geo", tags=["Geo"])
+
+
+@router.get("/autocomplete", response_model=List[PlaceResponse])
+async def autocomplete(
+    q: str = Query(..., min_length=2, max_length=100, description="Start of a city name"),
+    limit: int = Query(8, ge=1, le=20)
+):
+    """Suggest birth locations from the offline gazetteer."""
+    return [place._asdict() for place in gazetteer.search(q, limit)]
@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from ..config import settings
+from ..health import check_readiness
+from ..serialization import DefaultJSONResponse
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("")
+async def health_check():
+    """Health check endpoint (same as liveness)."""
+    return {"status": "healthy", "service": settings.app_name}
+
+
+@router.get("/live")
+async def liveness():
+    """The worker's event loop is responding; restart it if this fails."""
+    return {"status": "alive", "service": settings.app_name}
+
+
+@router.get("/ready")
+async def readiness_check():
+    """The worker can serve traffic: warmed up, MongoDB and the LLM provider reachable."""
+    ready, checks = await check_readiness()
+    return DefaultJSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "unavailable", "checks": checks},
+    )
@@ -4,6 +4,8 @@ from ..database import get_database
 from ..auth import get_password_hash
 from ..models.user import UserUpdate, UserResponse, UserCreate
 from ..dependencies import get_current_active_user
+from ..cache import user_cache
+from ..charts import BIRTH_FIELDS, birth_fields_changed, compute_user_chart
 from datetime import datetime, date
 from bson import ObjectId
 
@@ -30,6 +32,12 @@ async def update_profile(
     if "email" in update_data:
         del update_data['email']
     
+    # Recompute the natal chart only when birth data changes
+    if birth_fields_changed(current_user, update_data):
+        birth_data = {field: getattr(current_user, field) for field in BIRTH_FIELDS}
+        birth_data.update({field: update_data[field] for field in BIRTH_FIELDS if field in update_data})
+        update_data["natal_chart"] = compute_user_chart(**birth_data)
+    
     # Convert date to datetime for MongoDB compatibility
     if "birthdate" in update_data and isinstance(update_data["birthdate"], date):
         update_data["birthdate"] = datetime.combine(update_data["birthdate"], datetime.min.time())
@@ -39,9 +47,10 @@ async def update_profile(
     
     # Update user in database
     result = await database.users.update_one(
-        {"_id": current_user.id},
+        {"_id": ObjectId(current_user.id)},
         {"$set": update_data}
     )
+    await user_cache.invalidate(current_user.email)
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -50,8 +59,8 @@ async def update_profile(
         )
     
     # Get updated user data
-    updated_user = await database.users.find_one({"_id": current_user.id})
-    return UserResponse(**updated_user)
+    updated_user = await database.users.find_one({"_id": ObjectId(current_user.id)})
+    return UserResponse.from_mongo(updated_user)
 
 
 @router.get("", response_model=UserResponse)
@@ -59,7 +68,7 @@ async def get_profile(
     current_user = Depends(get_current_active_user)
 ):
     """Get current user profile."""
-    return current_user
+    return UserResponse.from_user(current_user)
 
 
 @router.delete("", status_code=status.HTTP_204_NO_CONTENT)
@@ -69,9 +78,10 @@ async def delete_profile(
 ):
     """Delete user profile (soft delete by setting is_active to False)."""
     result = await database.users.update_one(
-        {"_id": current_user.id},
+        {"_id": ObjectId(current_user.id)},
         {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
     )
+    await user_cache.invalidate(current_user.email)
     
     if result.modified_count == 0:
         raise HTTPException(
@@ -0,0 +1,28 @@
+"""
+JSON encoding for responses and stream payloads.
+
+orjson encodes several times faster than the standard library and straight
+to bytes, which is what the ASGI server writes anyway. Without it the
+standard library encoder is used, with the same output apart from
+whitespace and non-ASCII escaping.
+"""
+
+import json
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; falls back to the json module
+    orjson = None
+
+
+def dumps(value) -> bytes:
+    """Encode `value` as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+# The application's default_response_class
+DefaultJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
@@ -0,0 +1,98 @@
+"""
+Production server: python -m app.server
+
+`run.py` is the development runner (one process, auto-reload). This one
+starts SERVER_WORKERS processes (one per CPU by default) on uvloop and the
+httptools parser when they are installed (uvicorn[standard] pulls both in
+on Linux and macOS), with timeouts suited to long-lived SSE streams:
+
+* SERVER_KEEPALIVE_SECONDS keeps idle connections from the proxy open
+  longer than the proxy itself does, so it never reuses one we just closed
+* on SIGTERM each worker stops accepting, waits up to
+  SERVER_GRACEFUL_SHUTDOWN_SECONDS for open connections (streams in
+  progress) to finish, then runs the shutdown handlers, which give detached
+  generations SERVER_DRAIN_SECONDS more (see app.health.drain)
+
+The container stop timeout must cover both (docker-compose sets 60s).
+
+Workers share nothing in memory. The user cache and the rate-limit buckets
+must live in Redis (USER_CACHE_BACKEND / CHAT_RATE_LIMIT_BACKEND=redis)
+before more than one worker runs: otherwise an invalidated user stays
+cached in the other workers and every worker grants the full rate limit.
+With SERVER_WORKERS=0 the launcher therefore starts a single worker until
+both are on Redis. Stream sessions stay per worker either way; a resume
+that reaches another worker gets 404 and the client reads the persisted
+response instead.
+"""
+
+import importlib.util
+import logging
+import os
+
+import uvicorn
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-process state that must be shared once there is more than one worker
+SHARED_BACKENDS = {
+    "USER_CACHE_BACKEND": lambda: not settings.user_cache_enabled or settings.user_cache_backend == "redis",
+    "CHAT_RATE_LIMIT_BACKEND": lambda: (
+        not settings.chat_rate_limit_enabled or settings.chat_rate_limit_backend == "redis"
+    ),
+}
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def worker_count() -> int:
+    """SERVER_WORKERS, or one per CPU when every shared backend is on Redis."""
+    per_process = [name for name, shared in SHARED_BACKENDS.items() if not shared()]
+    if settings.server_workers == 0:
+        if per_process:
+            logger.warning(
+                "Starting 1 worker: %s not set to redis, so workers would not share state.",
+                " and ".join(per_process),
+            )
+            return 1
+        return os.cpu_count() or 1
+    if settings.server_workers > 1 and per_process:
+        logger.warning(
+            "SERVER_WORKERS=%d with %s not set to redis: user cache invalidation only reaches "
+            "one worker and each worker grants the full rate limit.",
+            settings.server_workers, " and ".join(per_process),
+        )
+    return settings.server_workers
+
+
+def server_options(workers: int) -> dict:
+    return {
+        "host": settings.server_host,
+        "port": settings.server_port,
+        "workers": workers,
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "backlog": settings.server_backlog,
+        "timeout_keep_alive": settings.server_keepalive_seconds,
+        "timeout_graceful_shutdown": settings.server_graceful_shutdown_seconds,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.server_forwarded_allow_ips,
+        "access_log": settings.server_access_log,
+        "log_level": settings.log_level.lower(),
+    }
+
+
+def main():
+    logging.basicConfig(level=settings.log_level.upper(), format="%(levelname)s:     %(message)s")
+    workers = worker_count()
+    # Each worker sizes its bcrypt pool from the environment it inherits: split the cores between them
+    if "password_hash_workers" not in settings.model_fields_set:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(max(1, (os.cpu_count() or 1) // workers))
+    uvicorn.run("app.main:app", **server_options(workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+import asyncio
+import time
+from typing import List
+from bson import ObjectId
+from .config import settings
+from .metrics import Counter, Gauge
+from .serialization import dumps
+
+chat_streams_cancelled = Counter(
+    "chat_streams_cancelled_total", "Streamed generations cancelled because every client disconnected"
+)
+chat_stream_tokens_saved = Counter(
+    "chat_stream_tokens_saved_total", "Estimated completion tokens not generated thanks to early cancellation"
+)
+chat_stream_subscribers = Gauge("chat_stream_subscribers", "Open SSE connections following a generation")
+
+
+class ResponseStatus:
+    STREAMING = "streaming"
+    COMPLETE = "complete"
+    ABORTED = "aborted"
+
+
+class ChunkWriter:
+    """
+    Buffers streamed response chunks and persists them incrementally.
+
+    Chunks are kept in a list and joined once, instead of growing a string
+    per token. Every `flush_chars` characters or `flush_interval` seconds the
+    unflushed tail is appended to `partial_response` on the message document,
+    so a disconnect or crash keeps everything up to `response_offset`.
+
+    Appends only apply while the message is still streaming from the offset
+    they were computed against, so one that lands after complete() or
+    abort() (both absolute writes) can't duplicate the tail.
+    """
+
+    def __init__(self, collection, message_id: ObjectId):
+        self.collection = collection
+        self.message_id = message_id
+        self.chunks: List[str] = []
+        self.length = 0
+        self.flushed_chunks = 0
+        self.persisted_length = 0
+        self.last_flush = time.monotonic()
+        self.closed = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    async def start(self):
+        """Mark the message as streaming."""
+        await self.collection.update_one(
+            {"_id": self.message_id},
+            {"$set": {
+                "response_status": ResponseStatus.STREAMING,
+                "partial_response": "",
+                "response_offset": 0,
+            }}
+        )
+
+    async def write(self, chunk: str):
+        """Buffer a chunk and flush when the size or time threshold is reached."""
+        self.chunks.append(chunk)
+        self.length += len(chunk)
+        if (
+            self.length - self.persisted_length >= settings.chat_stream_flush_chars
+            or time.monotonic() - self.last_flush >= settings.chat_stream_flush_interval
+        ):
+            await self.flush()
+
+    async def flush(self):
+        """Append the unflushed tail to the persisted partial response."""
+        if self.flushed_chunks == len(self.chunks):
+            return
+        tail = "".join(self.chunks[self.flushed_chunks:])
+        previous_length = self.persisted_length
+        self.flushed_chunks = len(self.chunks)
+        self.persisted_length = self.length
+        self.last_flush = time.monotonic()
+        # Pipeline update so only the tail goes over the wire; $literal keeps
+        # text starting with "$" from being read as a field path.
+        await self.collection.update_one(
+            {
+                "_id": self.message_id,
+                "response_status": ResponseStatus.STREAMING,
+                "response_offset": previous_length,
+            },
+            [{"$set": {
+                "partial_response": {"$concat": [{"$ifNull": ["$partial_response", ""]}, {"$literal": tail}]},
+                "response_offset": self.persisted_length,
+            }}]
+        )
+
+    async def complete(self) -> str:
+        """Persist the final response in a single write."""
+        text = self.text
+        await self.collection.update_one(
+            {"_id": self.message_id},
+            {
+                "$set": {
+                    "response": text,
+                    "response_status": ResponseStatus.COMPLETE,
+                    "response_offset": len(text),
+                },
+                "$unset": {"partial_response": ""},
+            }
+        )
+        # Only once the write landed: if it raised, abort() still has to run
+        self.closed = True
+        return text
+
+    async def abort(self):
+        """
+        Persist whatever was generated and mark the response as aborted.
+
+        An absolute write of the whole text, so it is correct whatever flushes
+        landed; it never downgrades a response whose completion did land.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        text = self.text
+        await self.collection.update_one(
+            {"_id": self.message_id, "response_status": {"$ne": ResponseStatus.COMPLETE}},
+            {"$set": {
+                "partial_response": text,
+                "response_status": ResponseStatus.ABORTED,
+                "response_offset": len(text),
+            }}
+        )
+
+
+_background_tasks = set()
+
+
+def run_in_background(coro):
+    """Run a coroutine detached from the current (possibly cancelled) task."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+class StreamSession:
+    """
+    Replay buffer for one streamed response.
+
+    Generation publishes events with monotonically increasing IDs, and any
+    number of SSE connections subscribe from a Last-Event-ID. Each event is
+    framed once, when published, and every subscriber (or replay) sends the
+    same bytes. The generation task runs detached from the HTTP connection
+    that started it.
+    """
+
+    def __init__(self, message_id: str, user_id: str):
+        self.message_id = message_id
+        self.user_id = user_id
+        self.events: List[tuple] = []
+        self.done = False
+        self.task: asyncio.Task = None
+        self.subscribers = 0
+        self.orphaned = False
+        self._orphan_timer: asyncio.TimerHandle = None
+        self._waiter = asyncio.Event()
+
+    def _notify(self):
+        self._waiter.set()
+        self._waiter = asyncio.Event()
+
+    def publish(self, data: bytes) -> int:
+        """Append a JSON-encoded event and wake subscribers. Returns its ID."""
+        event_id = len(self.events) + 1
+        self.events.append((event_id, encode_sse(event_id, data)))
+        self._notify()
+        return event_id
+
+    def finish(self):
+        self.done = True
+        self._cancel_orphan_timer()
+        self._notify()
+
+    def attach(self):
+        """A connection started following the session."""
+        self.subscribers += 1
+        chat_stream_subscribers.inc()
+        self._cancel_orphan_timer()
+
+    def detach(self):
+        """
+        A connection went away. Once nobody has followed the session for
+        CHAT_STREAM_DISCONNECT_GRACE_SECONDS (long enough for a client to
+        resume), the generation is cancelled instead of paying for tokens no
+        one will read.
+        """
+        self.subscribers -= 1
+        chat_stream_subscribers.dec()
+        if self.subscribers == 0 and not self.done:
+            self._orphan_timer = asyncio.get_running_loop().call_later(
+                settings.chat_stream_disconnect_grace_seconds, self._cancel_if_orphaned
+            )
+
+    def _cancel_orphan_timer(self):
+        if self._orphan_timer is not None:
+            self._orphan_timer.cancel()
+            self._orphan_timer = None
+
+    def _cancel_if_orphaned(self):
+        self._orphan_timer = None
+        if self.subscribers == 0 and not self.done and self.task is not None:
+            self.orphaned = True
+            chat_streams_cancelled.inc()
+            self.task.cancel()
+
+    async def subscribe(self, last_event_id: int = 0):
+        """
+        Yield (event_id, frame) from after `last_event_id`, following live events.
+
+        Yields None when nothing arrived within the heartbeat interval.
+        """
+        index = max(0, last_event_id)
+        while True:
+            waiter = self._waiter
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                return
+            try:
+                await asyncio.wait_for(waiter.wait(), settings.chat_stream_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield None
+
+
+class StreamRegistry:
+    """In-process registry of live and recently finished stream sessions."""
+
+    def __init__(self):
+        self.sessions = {}
+
+    def create(self, message_id: str, user_id: str) -> StreamSession:
+        session = StreamSession(message_id, user_id)
+        self.sessions[message_id] = session
+        return session
+
+    def get(self, message_id: str) -> StreamSession:
+        return self.sessions.get(message_id)
+
+    def start(self, session: StreamSession, coro):
+        """Run the generation in the background and expire the replay buffer later."""
+
+        def on_done(_):
+            session.finish()
+            asyncio.get_running_loop().call_later(
+                settings.chat_stream_replay_ttl_seconds,
+                self.sessions.pop, session.message_id, None
+            )
+
+        session.task = asyncio.create_task(coro)
+        session.task.add_done_callback(on_done)
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Let running generations finish for up to `timeout` seconds, then cancel
+        the rest (their partial answers are persisted as aborted). Returns the
+        number cancelled.
+        """
+        tasks = [session.task for session in self.sessions.values() if session.task and not session.task.done()]
+        if not tasks:
+            return 0
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        # The aborted writes run in the background; wait for them before connections close
+        if _background_tasks:
+            await asyncio.wait(list(_background_tasks), timeout=timeout)
+        return len(pending)
+
+
+stream_registry = StreamRegistry()
+
+
+def encode_sse(event_id: int, data: bytes) -> bytes:
+    """Frame one SSE event."""
+    return b"id: %d\ndata: %s\n\n" % (event_id, data)
+
+
+class EventEncoder:
+    """
+    JSON payloads of one stream's events.
+
+    Every event ends with the same `"message_id"` member, so it is encoded
+    once per stream; a chunk event only escapes the chunk text and splices
+    it between the constant parts.
+    """
+
+    def __init__(self, message_id: str):
+        self.suffix = b',"message_id":' + dumps(message_id) + b"}"
+
+    def chunk(self, text: str) -> bytes:
+        return b'{"chunk":' + dumps(text) + self.suffix
+
+    def done(self) -> bytes:
+        return b'{"done":true' + self.suffix
+
+    def aborted(self) -> bytes:
+        return b'{"aborted":true' + self.suffix
+
+    def error(self, message: str) -> bytes:
+        return b'{"error":' + dumps(message) + self.suffix
+
+
+async def sse_events(session: StreamSession, last_event_id: int = 0, request=None):
+    """
+    Render a session as an SSE byte stream with heartbeat comments.
+
+    The response is cancelled when the client disconnects; `request` is also
+    polled on heartbeats in case the disconnect was never delivered.
+    """
+    session.attach()
+    try:
+        yield b"retry: %d\n\n" % settings.chat_stream_retry_ms
+        async for event in session.subscribe(last_event_id):
+            if event is None:
+                if request is not None and await request.is_disconnected():
+                    return
+                yield b": ping\n\n"
+            else:
+                yield event[1]
+    finally:
+        session.detach()
+
+
+class CompletionLengths:
+    """Running mean of completed response lengths, to price cancelled generations."""
+
+    def __init__(self):
+        self.responses = 0
+        self.tokens = 0
+
+    def record(self, tokens: int):
+        self.responses += 1
+        self.tokens += tokens
+
+    def saved(self, generated: int) -> int:
+        """Tokens a generation cancelled after `generated` tokens would probably still have produced."""
+        expected = self.tokens / self.responses if self.responses else settings.llm_max_tokens
+        return max(0, round(expected) - generated)
+
+
+completion_lengths = CompletionLengths()
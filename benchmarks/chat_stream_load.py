@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Throughput and latency of /chat/send-stream against a running API.
+
+Start the backend with the local provider so no real tokens are spent:
+
+    LLM_PROVIDER=local LOCAL_LLM_TTFT_MS=300 LOCAL_LLM_TOKENS_PER_SECOND=50 python run.py
+
+then run:
+
+    python benchmarks/chat_stream_load.py --users 20 --requests 200 --concurrency 50
+
+The script registers throw-away users, logs them in, and fires streaming chat
+requests, reporting time-to-first-chunk, total stream time and chunks/sec.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def create_user(client: httpx.AsyncClient) -> str:
+    email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+    password = "load-test-password"
+    response = await client.post("/auth/register", json={
+        "name": "Load Test",
+        "email": email,
+        "phone_number": "1234567890",
+        "password": password,
+        "birthdate": "1990-05-15",
+        "birthtime": "02:30 PM",
+        "birth_location": "New York, NY, USA",
+    })
+    response.raise_for_status()
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def stream_once(client: httpx.AsyncClient, token: str, message: str, disconnect_after: int = 0):
+    started = time.perf_counter()
+    first_chunk = None
+    chunks = 0
+    failed = False
+    async with client.stream(
+        "POST", "/chat/send-stream",
+        json={"message": message},
+        headers={"Authorization": f"Bearer {token}"},
+    ) as response:
+        if response.status_code == 429:
+            return "rejected"
+        if response.status_code != 200:
+            return None
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            if '"chunk"' in line:
+                chunks += 1
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - started
+                if chunks == disconnect_after:
+                    # Like closing the tab: the server should cancel the generation
+                    break
+            elif '"error"' in line:
+                failed = True
+    return first_chunk, time.perf_counter() - started, chunks, failed
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=None) as client:
+        tokens = await asyncio.gather(*(create_user(client) for _ in range(args.users)))
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def worker(index):
+            async with semaphore:
+                return await stream_once(
+                    client, tokens[index % len(tokens)], f"{args.message} #{index}", args.disconnect_after
+                )
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(worker(i) for i in range(args.requests)))
+        wall = time.perf_counter() - started
+
+    rejected = results.count("rejected")
+    completed = [r for r in results if r is not None and r != "rejected"]
+    ttft = [r[0] for r in completed if r[0] is not None]
+    totals = [r[1] for r in completed]
+    chunks = sum(r[2] for r in completed)
+    errors = len(results) - len(completed) - rejected + sum(1 for r in completed if r[3])
+
+    print(f"requests={args.requests} concurrency={args.concurrency} wall={wall:.2f}s")
+    print(f"throughput: {len(completed) / wall:.1f} streams/s, {chunks / wall:.0f} chunks/s, errors={errors}, rejected (429)={rejected}")
+    if ttft:
+        print(f"first chunk: p50={statistics.median(ttft) * 1000:.0f}ms p99={percentile(ttft, 0.99) * 1000:.0f}ms")
+    if totals:
+        print(f"stream time: p50={statistics.median(totals) * 1000:.0f}ms p99={percentile(totals, 0.99) * 1000:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--message", default="What does my chart say about my career?")
+    parser.add_argument("--disconnect-after", type=int, default=0, help="close each stream after N chunks")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
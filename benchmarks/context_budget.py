@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+History tokens sent with each prompt as a conversation grows.
+
+* ``last 5 pairs`` - the previous behaviour: the newest five turns verbatim
+* ``budgeted``     - app/context.py: newest turns within CHAT_CONTEXT_TOKEN_BUDGET
+                     plus a rolling summary of at most CHAT_SUMMARY_MAX_TOKENS
+
+Answers are random lengths up to LLM_MAX_TOKENS words, like real long replies.
+
+    python benchmarks/context_budget.py --turns 60
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import settings  # noqa: E402
+from app.context import count_tokens, fit_turns, turn_tokens  # noqa: E402
+
+WORDS = "the moon venus mars career love house transit saturn return growth patience money family".split()
+
+
+def text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    summary = text(rng, settings.chat_summary_max_tokens)
+    turns = []
+    print(f"{'turn':>5} {'last 5 pairs':>13} {'budgeted':>9}")
+    for turn in range(1, args.turns + 1):
+        turns.insert(0, {
+            "message": text(rng, rng.randint(10, 60)),
+            "response": text(rng, rng.randint(100, settings.llm_max_tokens)),
+        })
+        legacy = sum(turn_tokens(t) for t in turns[:5])
+        summary_tokens = count_tokens(summary) if len(turns) > 3 else 0
+        window = fit_turns(turns[:settings.chat_context_max_turns], settings.chat_context_token_budget - summary_tokens)
+        budgeted = summary_tokens + sum(turn_tokens(t) for t in window)
+        if turn <= 10 or turn % 10 == 0:
+            print(f"{turn:>5} {legacy:>13,} {budgeted:>9,}")
+
+
+if __name__ == "__main__":
+    main()
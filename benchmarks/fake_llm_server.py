@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Minimal OpenAI-compatible LLM server for local load testing.
+
+Implements just enough of `/v1/chat/completions` (streaming) and
+`/v1/responses` (non-streaming) for the chat router, plus `/v1/models/{model}`
+for the readiness probe, with a configurable
+time-to-first-token and per-token delay so the API can be exercised
+without spending real tokens. With --prefill-us-per-char it also simulates
+provider prompt caching: only the uncached part of a prompt adds latency.
+
+    python benchmarks/fake_llm_server.py --port 9100 --ttft-ms 300 --token-ms 20
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+TTFT_SECONDS = 0.3
+TOKEN_SECONDS = 0.02
+TOKENS = 50
+WORD = "star "
+
+# Simulated prompt prefix cache: prompts are hashed in blocks (about 128
+# tokens) and only the part after the longest previously seen prefix pays
+# the prefill cost, like provider-side prompt caching.
+PREFILL_SECONDS_PER_CHAR = 0.0
+CACHE_BLOCK_CHARS = 512
+CACHE_MIN_CHARS = 4096
+_prefix_blocks = set()
+
+
+def prefill(body: dict) -> tuple:
+    """(seconds of prefill, cached characters, prompt characters) for a request."""
+    if "messages" in body:
+        prompt = "".join(f"{m.get('role')}\x00{m.get('content')}\x01" for m in body["messages"])
+    else:
+        prompt = str(body.get("input", ""))
+    digest = hashlib.sha256()
+    cached = 0
+    hit = True
+    for start in range(0, len(prompt) - CACHE_BLOCK_CHARS + 1, CACHE_BLOCK_CHARS):
+        digest.update(prompt[start:start + CACHE_BLOCK_CHARS].encode("utf-8"))
+        key = digest.hexdigest()
+        if hit and key in _prefix_blocks:
+            cached = start + CACHE_BLOCK_CHARS
+        else:
+            hit = False
+        _prefix_blocks.add(key)
+    if cached < CACHE_MIN_CHARS:
+        cached = 0
+    return (len(prompt) - cached) * PREFILL_SECONDS_PER_CHAR, cached, len(prompt)
+
+
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+
+    def frame(delta, finish_reason=None):
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    prefill_seconds, cached_chars, prompt_chars = prefill(body)
+
+    async def stream():
+        await asyncio.sleep(TTFT_SECONDS + prefill_seconds)
+        yield frame({"role": "assistant", "content": ""})
+        for _ in range(TOKENS):
+            yield frame({"content": WORD})
+            await asyncio.sleep(TOKEN_SECONDS)
+        yield frame({}, finish_reason="stop")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage = {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": TOKENS,
+                "total_tokens": prompt_chars // 4 + TOKENS,
+                "prompt_tokens_details": {"cached_tokens": cached_chars // 4},
+            }
+            yield f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model, 'choices': [], 'usage': usage})}\n\n"
+        yield "data: [DONE]\n\n"
+
+    if not body.get("stream"):
+        await asyncio.sleep(TTFT_SECONDS + prefill_seconds + TOKEN_SECONDS * TOKENS)
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": WORD * TOKENS},
+                "finish_reason": "stop",
+            }],
+        })
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+async def responses(request: Request):
+    body = await request.json()
+    prefill_seconds, _, _ = prefill(body)
+    await asyncio.sleep(TTFT_SECONDS + prefill_seconds + TOKEN_SECONDS * TOKENS)
+    return JSONResponse({
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model", "fake"),
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": f"msg_{uuid.uuid4().hex}",
+            "status": "completed",
+            "role": "assistant",
+            "content": [{"type": "output_text", "text": WORD * TOKENS, "annotations": []}],
+        }],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+    })
+
+
+async def retrieve_model(request: Request):
+    return JSONResponse({
+        "id": request.path_params["model"],
+        "object": "model",
+        "created": 0,
+        "owned_by": "fake",
+    })
+
+
+app = Starlette(routes=[
+    Route("/v1/chat/completions", chat_completions, methods=["POST"]),
+    Route("/v1/responses", responses, methods=["POST"]),
+    Route("/v1/models/{model}", retrieve_model, methods=["GET"]),
+])
+
+
+def main():
+    global TTFT_SECONDS, TOKEN_SECONDS, TOKENS, PREFILL_SECONDS_PER_CHAR
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--ttft-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--prefill-us-per-char", type=float, default=0.0,
+                        help="simulated prefill cost per uncached prompt character")
+    args = parser.parse_args()
+
+    TTFT_SECONDS = args.ttft_ms / 1000
+    TOKEN_SECONDS = args.token_ms / 1000
+    TOKENS = args.tokens
+    PREFILL_SECONDS_PER_CHAR = args.prefill_us_per_char / 1e6
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Lookup latency of the offline gazetteer (app/gazetteer.py).
+
+* ``load``    - first use: map the index file
+* ``prefix``  - autocomplete queries for 2..6 leading letters of real names
+* ``fuzzy``   - misspelled names (two letters swapped), the fallback path
+* ``resolve`` - full "City, Country" birth locations, as charts use
+
+    python benchmarks/gazetteer.py --queries 5000
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.gazetteer import Gazetteer  # noqa: E402
+
+
+def timed(function, queries):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        function(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    if len(name) < 5:
+        return name
+    i = rng.randrange(2, len(name) - 1)
+    return name[:i - 1] + name[i] + name[i - 1] + name[i + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    gazetteer = Gazetteer()
+    started = time.perf_counter()
+    if not gazetteer.available:
+        sys.exit("gazetteer index not found; run scripts/build_gazetteer.py")
+    print(f"load:    {(time.perf_counter() - started) * 1000:8.2f} ms")
+
+    rng = random.Random(args.seed)
+    places = [gazetteer._place(rng.randrange(len(gazetteer._cities))) for _ in range(args.queries)]
+    prefixes = [place.name[:rng.randint(2, 6)] for place in places]
+    misspelled = [misspell(place.name, rng) for place in places[:max(1, args.queries // 10)]]
+    locations = [place.label for place in places]
+
+    for name, function, queries in (
+        ("prefix", lambda q: gazetteer.search(q, 8), prefixes),
+        ("fuzzy", lambda q: gazetteer.search(q, 8), misspelled),
+        ("resolve", gazetteer.resolve, locations),
+    ):
+        p50, p99 = timed(function, queries)
+        print(f"{name + ':':8} p50 {p50:7.3f} ms   p99 {p99:7.3f} ms   ({len(queries)} queries)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Per-core cost of the JSON on the chat hot paths.
+
+* SSE frames: the previous path (json.dumps of a dict per chunk, an f-string
+  frame per subscriber, str -> bytes in the response) against EventEncoder
+  with frames built once at publish time
+* response rendering: JSONResponse against the default response class
+  for a 50-message history page
+
+    python benchmarks/json_encoding.py --chunks 200000 --subscribers 1
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.serialization import DefaultJSONResponse, orjson  # noqa: E402
+from app.streaming import EventEncoder, encode_sse  # noqa: E402
+
+MESSAGE_ID = "65a0000000000000000000ff"
+# Typical streamed tokens, including non-ASCII and characters JSON must escape
+CHUNKS = [" Your", " Venus", " in", " Libra", " favours", " harmony", " —", " \"balance\"", "\n", " ✨"]
+
+
+def old_frames(count: int, subscribers: int):
+    events = []
+    for i in range(count):
+        data = json.dumps({"chunk": CHUNKS[i % len(CHUNKS)], "message_id": MESSAGE_ID})
+        events.append((i + 1, data))
+        for _ in range(subscribers):
+            f"id: {i + 1}\ndata: {data}\n\n".encode("utf-8")
+
+
+def new_frames(count: int, subscribers: int):
+    events = []
+    encoder = EventEncoder(MESSAGE_ID)
+    for i in range(count):
+        events.append((i + 1, encode_sse(i + 1, encoder.chunk(CHUNKS[i % len(CHUNKS)]))))
+        for _ in range(subscribers):
+            # Subscribers send the stored frame as is
+            events[-1][1]
+
+
+def history_page(size: int = 50):
+    created = datetime(2024, 1, 1, 12, 0)
+    return [
+        {
+            "id": f"65a0000000000000000{i:05d}",
+            "message": "What does my chart say about my career this month?",
+            "response": "With the Sun in your tenth house, recognition comes through steady work. " * 6,
+            "is_user_message": True,
+            "created_at": (created + timedelta(minutes=i)).isoformat(),
+        }
+        for i in range(size)
+    ]
+
+
+def render(response_class, content, count: int):
+    for _ in range(count):
+        response_class(content)
+
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--subscribers", type=int, default=1, help="connections following each stream")
+    parser.add_argument("--pages", type=int, default=5000, help="history pages rendered")
+    args = parser.parse_args()
+
+    print(f"orjson: {'installed' if orjson is not None else 'missing (standard library fallback)'}")
+    print(f"SSE frames, {args.subscribers} subscriber(s):")
+    for name, fn in (("json.dumps", old_frames), ("EventEncoder", new_frames)):
+        elapsed = timed(fn, args.chunks, args.subscribers)
+        print(f"  {name:<14} {args.chunks / elapsed:>12,.0f} frames/s")
+
+    page = history_page()
+    print("50-message history page:")
+    for name, response_class in (("JSONResponse", JSONResponse), (DefaultJSONResponse.__name__, DefaultJSONResponse)):
+        elapsed = timed(render, response_class, page, args.pages)
+        print(f"  {name:<14} {elapsed / args.pages * 1e6:>9.1f} us/page")
+
+
+if __name__ == "__main__":
+    main()
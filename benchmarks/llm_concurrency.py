@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Load test for the chat LLM pipeline against the local fake LLM server.
+
+Runs N concurrent streaming completions twice inside one event loop:
+
+* ``blocking`` - the previous pattern, a synchronous ``OpenAI`` client
+  iterated from inside a coroutine (every call stalls the loop);
+* ``async``    - the shared ``AsyncOpenAI`` client from ``app.llm`` driven
+  through ``generate_ai_response_stream``.
+
+For each mode it reports wall time, completions/sec, p50/p99 latency and the
+worst event-loop stall observed by a 10 ms ticker task.
+
+    python benchmarks/llm_concurrency.py --concurrency 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+USER = SimpleNamespace(
+    name="Load Test",
+    birthdate=date(1990, 5, 15),
+    birthtime="02:30 PM",
+    birth_location="New York, NY, USA",
+)
+MESSAGES = [{"role": "user", "content": "What does my chart say about work?"}]
+
+
+async def loop_lag_monitor(stop: asyncio.Event, samples: list):
+    """Record how late a 10 ms timer fires while the test runs."""
+    interval = 0.01
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+
+async def run_blocking(base_url: str, concurrency: int):
+    from openai import OpenAI
+
+    client = OpenAI(api_key="fake", base_url=base_url)
+
+    async def one():
+        started = time.perf_counter()
+        stream = client.chat.completions.create(model="gpt-4.1", messages=MESSAGES, stream=True)
+        for _ in stream:
+            pass
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*(one() for _ in range(concurrency)))
+
+
+async def run_async(base_url: str, concurrency: int):
+    from app.config import settings
+    from app.llm import connect_to_llm, close_llm_connection
+    from app.routers.chat import generate_ai_response_stream
+
+    settings.openai_base_url = base_url
+    await connect_to_llm()
+
+    async def one():
+        started = time.perf_counter()
+        async for _ in generate_ai_response_stream("What does my chart say about work?", USER):
+            pass
+        return time.perf_counter() - started
+
+    try:
+        return await asyncio.gather(*(one() for _ in range(concurrency)))
+    finally:
+        await close_llm_connection()
+
+
+async def measure(name: str, runner, base_url: str, concurrency: int):
+    stop = asyncio.Event()
+    lag = []
+    monitor = asyncio.create_task(loop_lag_monitor(stop, lag))
+    started = time.perf_counter()
+    latencies = sorted(await runner(base_url, concurrency))
+    wall = time.perf_counter() - started
+    stop.set()
+    await monitor
+
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:<9} wall={wall:7.2f}s  rps={concurrency / wall:7.1f}  "
+        f"p50={statistics.median(latencies):6.2f}s  p99={p99:6.2f}s  "
+        f"max_loop_stall={max(lag, default=0) * 1000:8.1f}ms"
+    )
+
+
+def wait_for_port(host: str, port: int, timeout: float = 10.0):
+    import socket
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"fake LLM server did not start on {host}:{port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--ttft-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--base-url", help="use an already running server instead of spawning one")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = subprocess.Popen([
+            sys.executable, str(ROOT / "benchmarks" / "fake_llm_server.py"),
+            "--port", str(args.port),
+            "--ttft-ms", str(args.ttft_ms),
+            "--token-ms", str(args.token_ms),
+            "--tokens", str(args.tokens),
+        ])
+        wait_for_port("127.0.0.1", args.port)
+        base_url = f"http://127.0.0.1:{args.port}/v1"
+
+    os.environ.setdefault("OPEN_AI_KEY", "fake")
+    try:
+        print(f"{args.concurrency} concurrent streams, {args.tokens} tokens each")
+        asyncio.run(measure("blocking", run_blocking, base_url, args.concurrency))
+        asyncio.run(measure("async", run_async, base_url, args.concurrency))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Per-request Pydantic cost of a 50-message history page and a user lookup,
+before and after the trusted paths for data loaded from MongoDB.
+
+* history: one validated ChatMessageResponse per row, serialized by FastAPI
+  for response_model=List[ChatMessageResponse] and rendered, against
+  history_row() dicts encoded directly
+* user lookup: the previous UserInDB (EmailStr and the birthtime strptime
+  check on every request) against UserInDB.from_mongo
+
+    python benchmarks/model_validation.py --requests 5000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bson import ObjectId  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from pydantic import Field  # noqa: E402
+
+from app.models.chat import ChatMessageResponse  # noqa: E402
+from app.models.user import UserBase, UserInDB  # noqa: E402
+from app.routers.chat import history_row  # noqa: E402
+from app.serialization import DefaultJSONResponse  # noqa: E402
+
+
+class ValidatedUserInDB(UserBase):
+    """UserInDB as it was: the input model's validators ran on every lookup."""
+    id: str = Field(alias="_id")
+    hashed_password: str
+    created_at: datetime
+    updated_at: datetime
+    is_active: bool = True
+    natal_chart: Optional[dict] = None
+
+
+def history_rows(size: int):
+    created = datetime(2024, 1, 1, 12, 0)
+    return [
+        {
+            "_id": ObjectId(),
+            "message": "What does my chart say about my career this month?",
+            "response": "With the Sun in your tenth house, recognition comes through steady work. " * 6,
+            "is_user_message": True,
+            "created_at": created + timedelta(minutes=i),
+        }
+        for i in range(size)
+    ]
+
+
+def user_document():
+    return {
+        "_id": ObjectId(),
+        "name": "Load Test",
+        "email": "load-test@example.com",
+        "phone_number": "1234567890",
+        "birthdate": datetime(1990, 5, 15),
+        "birthtime": "02:30 PM",
+        "birth_location": "New York, NY, USA",
+        "hashed_password": "$2b$12$" + "x" * 53,
+        "created_at": datetime(2024, 1, 1),
+        "updated_at": datetime(2024, 1, 1),
+        "is_active": True,
+        "natal_chart": {"sun": "Taurus", "moon": "Leo", "ascendant": "Virgo"},
+    }
+
+
+async def validated_page(rows, field):
+    messages = [
+        ChatMessageResponse(
+            id=str(msg["_id"]),
+            response=msg["response"],
+            message=msg["message"],
+            is_user_message=msg["is_user_message"],
+            created_at=msg["created_at"],
+        )
+        for msg in rows
+    ]
+    return DefaultJSONResponse(await serialize_response(field=field, response_content=messages))
+
+
+async def trusted_page(rows, field):
+    return DefaultJSONResponse([history_row(msg) for msg in rows])
+
+
+def validated_user(doc):
+    doc = dict(doc, _id=str(doc["_id"]), birthdate=doc["birthdate"].date())
+    return ValidatedUserInDB(**doc)
+
+
+async def time_history(build, rows, field, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        await build(rows, field)
+    return time.perf_counter() - started
+
+
+def time_user(build, doc, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        build(doc)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = history_rows(args.page_size)
+    field = create_response_field(name="Response", type_=List[ChatMessageResponse])
+    print(f"{args.page_size}-message history page (build, serialize, render):")
+    for name, build in (("validated", validated_page), ("history_row", trusted_page)):
+        elapsed = asyncio.run(time_history(build, rows, field, args.requests))
+        print(f"  {name:<12} {elapsed / args.requests * 1e6:>8.1f} us/request")
+
+    doc = user_document()
+    print("user lookup:")
+    for name, build in (("validated", validated_user), ("from_mongo", UserInDB.from_mongo)):
+        elapsed = time_user(build, doc, args.requests)
+        print(f"  {name:<12} {elapsed / args.requests * 1e6:>8.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
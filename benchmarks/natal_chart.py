@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Throughput of the local ephemeris engine (app/astrology.py) on one core.
+
+* ``batch``  - vectorized body longitudes + ascendant for N random births
+* ``single`` - one natal_chart() call per birth, as the chat path does
+
+    python benchmarks/natal_chart.py --charts 10000
+"""
+
+import argparse
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.astrology import ascendant, body_longitudes, julian_day, natal_chart  # noqa: E402
+
+
+def random_births(count: int, rng: np.random.Generator):
+    start = np.datetime64("1940-01-01T00:00:00")
+    seconds = rng.integers(0, 80 * 365 * 86400, size=count)
+    moments = start + seconds.astype("timedelta64[s]")
+    latitudes = rng.uniform(-60, 60, size=count)
+    longitudes = rng.uniform(-180, 180, size=count)
+    return moments, latitudes, longitudes
+
+
+def bench_batch(count: int, rng: np.random.Generator) -> float:
+    moments, latitudes, longitudes = random_births(count, rng)
+    started = time.perf_counter()
+    jd = julian_day(moments)
+    body_longitudes(jd)
+    ascendant(jd, latitudes, longitudes)
+    return count / (time.perf_counter() - started)
+
+
+def bench_single(count: int, rng: np.random.Generator) -> float:
+    moments, latitudes, longitudes = random_births(count, rng)
+    births = [
+        (moment.astype(object), float(lat), float(lon))
+        for moment, lat, lon in zip(moments, latitudes, longitudes)
+    ]
+    started = time.perf_counter()
+    for moment, lat, lon in births:
+        natal_chart(date(moment.year, moment.month, moment.day), moment.strftime("%I:%M %p"), lat, lon)
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--charts", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    bench_batch(100, rng)  # warm up
+    print(f"batch:  {bench_batch(args.charts, rng):12,.0f} charts/s")
+    print(f"single: {bench_single(min(args.charts, 5000), rng):12,.0f} charts/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Login-storm benchmark for bcrypt verification.
+
+Verifies N passwords concurrently, first inline on the event loop (the old
+behaviour of /auth/login) and then through the password worker pool, and
+reports wall time and the worst event-loop stall seen by a 10 ms ticker.
+
+    python benchmarks/password_pool.py --logins 64
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.auth import get_password_hash, verify_password, verify_password_async  # noqa: E402
+from app.config import settings  # noqa: E402
+
+
+async def loop_lag_monitor(stop: asyncio.Event, samples: list):
+    interval = 0.01
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+
+async def measure(name: str, verify, logins: int, hashed: str):
+    stop = asyncio.Event()
+    lag = []
+    monitor = asyncio.create_task(loop_lag_monitor(stop, lag))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(verify("correct horse battery", hashed) for _ in range(logins)))
+    wall = time.perf_counter() - started
+    stop.set()
+    await monitor
+    print(f"{name:<7} wall={wall:6.2f}s  logins/s={logins / wall:7.1f}  max_loop_stall={max(lag, default=0) * 1000:8.1f}ms")
+
+
+async def inline_verify(plain: str, hashed: str) -> bool:
+    return verify_password(plain, hashed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    args = parser.parse_args()
+
+    hashed = get_password_hash("correct horse battery")
+    print(f"{args.logins} concurrent logins, {settings.password_hash_workers} password workers")
+    asyncio.run(measure("inline", inline_verify, args.logins, hashed))
+    asyncio.run(measure("pool", verify_password_async, args.logins, hashed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Prompt assembly cost and first-token latency, before and after the
+prefix-cache-friendly layout (app/prompts.py).
+
+* ``legacy``   - one system prompt per request: the instructions f-string
+                 with the user's details, today's date and the astrological
+                 facts (which move with the Moon) interpolated at the end,
+                 followed by the conversation
+* ``prefixed`` - the static, precompiled instructions, then the conversation,
+                 then a trailing message with the per-user/per-day values
+
+First-token latency is measured against the fake LLM server with simulated
+prompt caching (only the uncached suffix of a prompt pays prefill), or any
+OpenAI-compatible endpoint given with --base-url.
+
+    python benchmarks/prompt_layout.py --users 5 --turns 6
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from app.prompts import CHAT_SYSTEM, CHAT_USER_CONTEXT  # noqa: E402
+
+from llm_concurrency import wait_for_port  # noqa: E402
+
+# The previous inline f-string: instructions indented inside the function body
+LEGACY_TEMPLATE = textwrap.indent(CHAT_SYSTEM.text + "\n\n---\n\n" + CHAT_USER_CONTEXT.text, " " * 8)
+
+ANSWER = "The Moon moves through your tenth house, favouring steady work and patience. " * 8
+
+
+def user_values(user: int, request: int) -> dict:
+    return {
+        "name": f"User {user}",
+        "birthdate": "May 15, 1990",
+        "birthtime": "02:30 PM",
+        "birth_location": "Pune, India",
+        "today": "January 31, 2024",
+        # Current positions change between requests (the Moon moves ~0.5 deg/hour)
+        "astro_facts": f"* Sun Sign: Taurus\n* Current Positions: Moon Capricorn {request * 0.37 % 30:.2f}°",
+        "conversation_summary": "None yet",
+    }
+
+
+def legacy_messages(values: dict, turns: list, message: str) -> list:
+    messages = [{"role": "system", "content": LEGACY_TEMPLATE.format(**values)}]
+    for question, answer in turns:
+        messages += [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+    return messages + [{"role": "user", "content": message}]
+
+
+def prefixed_messages(values: dict, turns: list, message: str) -> list:
+    messages = [{"role": "system", "content": CHAT_SYSTEM.text}]
+    for question, answer in turns:
+        messages += [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+    messages.append({"role": "system", "content": CHAT_USER_CONTEXT.render(**values)})
+    return messages + [{"role": "user", "content": message}]
+
+
+LAYOUTS = {"legacy": legacy_messages, "prefixed": prefixed_messages}
+
+
+def bench_assembly(iterations: int):
+    values = user_values(1, 1)
+    turns = [("What about my career?", ANSWER)] * 5
+    for name, build in LAYOUTS.items():
+        started = time.perf_counter()
+        for _ in range(iterations):
+            build(values, turns, "And my relationships?")
+        elapsed = time.perf_counter() - started
+        print(f"assembly {name:<9} {elapsed / iterations * 1e6:8.2f} us/prompt")
+
+
+async def bench_ttft(name: str, base_url: str, users: int, turns: int):
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI(api_key=os.environ.get("OPEN_AI_KEY", "fake"), base_url=base_url)
+    build = LAYOUTS[name]
+    latencies, cached, prompt = [], 0, 0
+
+    async def conversation(user: int):
+        nonlocal cached, prompt
+        history = []
+        for turn in range(turns):
+            message = f"Question {turn} about my chart?"
+            messages = build(user_values(user, user * turns + turn), history, message)
+            started = time.perf_counter()
+            stream = await client.chat.completions.create(
+                model="gpt-4.1", messages=messages, stream=True, max_tokens=20,
+                stream_options={"include_usage": True},
+            )
+            first = None
+            async for chunk in stream:
+                if first is None and chunk.choices and chunk.choices[0].delta.content:
+                    first = time.perf_counter() - started
+                if chunk.usage is not None:
+                    prompt += chunk.usage.prompt_tokens
+                    details = chunk.usage.prompt_tokens_details
+                    cached += (details.cached_tokens or 0) if details else 0
+            latencies.append(first or 0.0)
+            history.append((message, ANSWER))
+
+    await asyncio.gather(*(conversation(user) for user in range(users)))
+    await client.close()
+    latencies.sort()
+    print(
+        f"ttft     {name:<9} p50={statistics.median(latencies) * 1000:7.1f}ms  "
+        f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f}ms  "
+        f"cached prompt tokens={cached / max(prompt, 1):6.1%}"
+    )
+
+
+def start_server(port: int, ttft_ms: float, prefill_us: float):
+    server = subprocess.Popen([
+        sys.executable, str(ROOT / "benchmarks" / "fake_llm_server.py"),
+        "--port", str(port), "--ttft-ms", str(ttft_ms), "--token-ms", "1", "--tokens", "20",
+        "--prefill-us-per-char", str(prefill_us),
+    ])
+    wait_for_port("127.0.0.1", port)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--ttft-ms", type=float, default=100)
+    parser.add_argument("--prefill-us-per-char", type=float, default=40)
+    parser.add_argument("--base-url", help="measure against this endpoint instead of the fake server")
+    args = parser.parse_args()
+
+    bench_assembly(args.iterations)
+    for name in LAYOUTS:
+        # A fresh fake server per layout so neither starts with a warm cache
+        server = None
+        base_url = args.base_url
+        if base_url is None:
+            server = start_server(args.port, args.ttft_ms, args.prefill_us_per_char)
+            base_url = f"http://127.0.0.1:{args.port}/v1"
+        try:
+            asyncio.run(bench_ttft(name, base_url, args.users, args.turns))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Requests/sec and latency of the development runner (run.py: one process,
+auto-reload, default loop) against the production server (python -m app.server:
+one worker per CPU, uvloop, httptools).
+
+Each server is started in turn on port 8000 and loaded from several client
+processes, so the load generator is not the bottleneck:
+
+    python benchmarks/server_throughput.py --duration 10 --clients 4 --concurrency 64
+
+The default path, /health/live, measures the HTTP stack alone; pass
+--path /health to include the routing and middleware of a JSON endpoint.
+Stop anything else listening on port 8000 first.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+BASE_URL = "http://127.0.0.1:8000"
+
+SERVERS = {
+    "run.py": [sys.executable, "run.py"],
+    "app.server": [sys.executable, "-m", "app.server"],
+}
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def load(path: str, duration: float, concurrency: int):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=BASE_URL, limits=limits, timeout=10) as client:
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - started)
+                except httpx.HTTPError:
+                    errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def client_process(args):
+    path, duration, concurrency = args
+    return asyncio.run(load(path, duration, concurrency))
+
+
+def wait_until_live(process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if httpx.get(BASE_URL + "/health/live", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("server did not start")
+
+
+def bench(name: str, args):
+    env = dict(
+        os.environ,
+        LLM_PROVIDER="local",
+        HEALTH_CHECK_LLM="false",
+        LOG_LEVEL="WARNING",
+        SERVER_HOST="127.0.0.1",
+        SERVER_PORT="8000",
+    )
+    # Explicit, since SERVER_WORKERS=0 means one worker while the caches are in memory
+    env["SERVER_WORKERS"] = str(args.workers or os.cpu_count() or 1)
+    process = subprocess.Popen(SERVERS[name], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_live(process)
+        # Warm up connections and code paths before measuring
+        client_process((args.path, 1.0, args.concurrency))
+        with multiprocessing.Pool(args.clients) as pool:
+            started = time.perf_counter()
+            results = pool.map(client_process, [(args.path, args.duration, args.concurrency)] * args.clients)
+            wall = time.perf_counter() - started
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+    latencies = [latency for result in results for latency in result[0]]
+    errors = sum(result[1] for result in results)
+    print(
+        f"{name:<11} {len(latencies) / wall:>8.0f} req/s"
+        f"  p50={statistics.median(latencies) * 1000:.1f}ms"
+        f"  p99={percentile(latencies, 0.99) * 1000:.1f}ms"
+        f"  errors={errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default="/health/live")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per server")
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=64, help="connections per client process")
+    parser.add_argument("--workers", type=int, default=0, help="app.server workers (default: one per CPU)")
+    parser.add_argument("--server", choices=sorted(SERVERS), action="append", help="only run these (repeatable)")
+    args = parser.parse_args()
+    print(f"GET {args.path}, {args.clients}x{args.concurrency} connections, {args.duration:.0f}s per server")
+    for name in args.server or SERVERS:
+        bench(name, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Build the bundled gazetteer index (app/data/gazetteer.bin) used to resolve
+birth locations offline.
+
+City data comes from GeoNames (CC BY 4.0) through the ``geonamescache``
+package, which is only needed to rebuild the index:
+
+    pip install geonamescache
+    python scripts/build_gazetteer.py
+
+The file layout is documented in app/gazetteer.py.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.gazetteer import CITY_DTYPE, HEADER, KEY_DTYPE, MAGIC, fold, letter_mask  # noqa: E402
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent.parent / "app" / "data" / "gazetteer.bin"
+MAX_KEY_LENGTH = 60
+
+
+def load_cities(min_population: int):
+    try:
+        import geonamescache
+    except ImportError:
+        sys.exit("geonamescache is required to build the gazetteer: pip install geonamescache")
+
+    cache = geonamescache.GeonamesCache()
+    countries = {code: country["name"] for code, country in cache.get_countries().items()}
+    states = {state["code"]: state["name"] for state in cache.get_us_states().values()}
+    for city in cache.get_cities().values():
+        if city["population"] < min_population or not city["timezone"]:
+            continue
+        parts = [city["name"]]
+        if city["countrycode"] == "US" and city["admin1code"] in states:
+            parts.append(states[city["admin1code"]])
+        parts.append(countries.get(city["countrycode"], city["countrycode"]))
+        yield city, ", ".join(parts)
+
+
+def search_keys(city, alternate_min_population: int):
+    """Folded ASCII names a city can be found under, mapped to the alias flag."""
+    primary = fold(city["name"])
+    keys = {primary: 0}
+    if city["population"] >= alternate_min_population or not primary.isascii():
+        # Latin-script exonyms ("munich", "bombay"); other scripts don't fold to ASCII
+        for name in city["alternatenames"]:
+            keys.setdefault(fold(name), 1)
+    return {
+        key: alias for key, alias in keys.items()
+        if key and len(key) <= MAX_KEY_LENGTH and key.isascii() and key.replace(" ", "").isalnum()
+    }
+
+
+def build(output: Path, min_population: int, alternate_min_population: int):
+    cities = sorted(load_cities(min_population), key=lambda item: -item[0]["population"])
+    timezones = sorted({city["timezone"] for city, _ in cities})
+    timezone_index = {name: index for index, name in enumerate(timezones)}
+
+    records = np.zeros(len(cities), dtype=CITY_DTYPE)
+    labels = bytearray()
+    keys = []
+    for index, (city, label) in enumerate(cities):
+        encoded = label.encode("utf-8")
+        records[index] = (
+            city["latitude"], city["longitude"], city["population"], len(labels), len(encoded),
+            len(city["name"].encode("utf-8")), timezone_index[city["timezone"]], city["countrycode"].encode("ascii"),
+        )
+        labels += encoded
+        keys.extend(
+            (key.encode("ascii"), index, alias)
+            for key, alias in search_keys(city, alternate_min_population).items()
+        )
+
+    # Keys sort bytewise; ties keep the more populous city first
+    keys.sort()
+    key_records = np.zeros(len(keys), dtype=KEY_DTYPE)
+    key_blob = bytearray()
+    for index, (key, city_index, alias) in enumerate(keys):
+        key_records[index] = (len(key_blob), city_index, letter_mask(key.decode("ascii")), len(key), alias)
+        key_blob += key
+
+    timezone_blob = "\n".join(timezones).encode("ascii")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records), len(key_records), len(key_blob), len(labels), len(timezone_blob)))
+        f.write(records.tobytes())
+        f.write(key_records.tobytes())
+        f.write(key_blob)
+        f.write(labels)
+        f.write(timezone_blob)
+
+    print(f"{output}: {len(records):,} cities, {len(key_records):,} keys, "
+          f"{len(timezones)} timezones, {output.stat().st_size / 1e6:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--min-population", type=int, default=15000)
+    parser.add_argument("--alternate-min-population", type=int, default=100000,
+                        help="index alternate (exonym) names only for cities at least this large")
+    args = parser.parse_args()
+    build(args.output, args.min_population, args.alternate_min_population)
+
+
+if __name__ == "__main__":
+    main()
@@ -61,6 +61,10 @@ document.getElementById('loginForm').addEventListener('submit', handleLogin);
 document.getElementById('registerForm').addEventListener('submit', handleRegister);
 document.getElementById('updateForm').addEventListener('submit', handleUpdateProfile);
 
+// Birth location autocomplete (offline gazetteer)
+document.getElementById('register-birthlocation').addEventListener('input', suggestBirthLocations);
+document.getElementById('edit-birthlocation').addEventListener('input', suggestBirthLocations);
+
 // Chat input event listener
 document.getElementById('chat-input').addEventListener('keypress', function(e) {
     if (e.key === 'Enter') {
@@ -68,6 +72,37 @@ document.getElementById('chat-input').addEventListener('keypress', function(e) {
     }
 });
 
+// Birth location suggestions
+let birthLocationTimer = null;
+let birthLocationQuery = '';
+
+function suggestBirthLocations(e) {
+    const query = e.target.value.trim();
+    clearTimeout(birthLocationTimer);
+    if (query.length < 2 || query === birthLocationQuery) {
+        return;
+    }
+    birthLocationTimer = setTimeout(async () => {
+        birthLocationQuery = query;
+        try {
+            const response = await fetch(`${API_BASE_URL}/geo/autocomplete?q=${encodeURIComponent(query)}&limit=8`);
+            if (!response.ok || query !== birthLocationQuery) {
+                return;
+            }
+            const places = await response.json();
+            const options = document.getElementById('birthlocation-options');
+            options.innerHTML = '';
+            places.forEach(place => {
+                const option = document.createElement('option');
+                option.value = place.label;
+                options.appendChild(option);
+            });
+        } catch (error) {
+            console.error('Location lookup error:', error);
+        }
+    }, 150);
+}
+
 // Login handler
 async function handleLogin(e) {
     e.preventDefault();
@@ -318,6 +353,11 @@ async function sendMessage() {
 }
 
 async function sendMessageStream(message) {
+    // Stream state shared across reconnects
+    // received counts characters (code points, like the server's offsets) already shown
+    const state = { messageId: null, lastEventId: 0, received: 0 };
+    let aiMessageId = null;
+
     try {
         const response = await fetch(`${API_BASE_URL}/chat/send-stream`, {
             method: 'POST',
@@ -328,83 +368,152 @@ async function sendMessageStream(message) {
             body: JSON.stringify({ message: message })
         });
         
+        if (response.status === 429) {
+            const retryAfter = response.headers.get('Retry-After') || 'a few';
+            hideTypingIndicator();
+            addMessageToChat(`You're sending messages too quickly. Please try again in ${retryAfter} seconds.`, false);
+            return;
+        }
+
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
-        
+
         // Hide typing indicator
         hideTypingIndicator();
         
         // Create AI message container
-        const aiMessageId = 'ai-message-' + Date.now();
+        aiMessageId = 'ai-message-' + Date.now();
         createAIMessageContainer(aiMessageId);
         
-        // Use EventSource-like approach for better SSE handling
-        const reader = response.body.getReader();
-        const decoder = new TextDecoder();
-        let buffer = '';
+        if (await readSSEStream(response, aiMessageId, state)) {
+            return;
+        }
+    } catch (error) {
+        console.error('Error in sendMessageStream:', error);
+    }
+
+    // The connection dropped mid-answer: resume from the last event instead of asking again
+    for (let attempt = 1; aiMessageId && state.messageId && attempt <= 3; attempt++) {
+        try {
+            await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+            const response = await fetch(`${API_BASE_URL}/chat/stream/${state.messageId}`, {
+                headers: {
+                    'Authorization': `Bearer ${authToken}`,
+                    'Last-Event-ID': String(state.lastEventId)
+                }
+            });
+            if (response.status === 404) {
+                // The session lives in another worker or has expired: read what was persisted
+                if (await readPersistedResponse(aiMessageId, state)) {
+                    return;
+                }
+                break;
+            }
+            if (!response.ok) {
+                break;
+            }
+            if (await readSSEStream(response, aiMessageId, state)) {
+                return;
+            }
+        } catch (error) {
+            console.error('Error resuming stream:', error);
+        }
+    }
+
+    hideTypingIndicator();
+    if (aiMessageId) {
+        removeCursor(aiMessageId);
+    } else {
+        addMessageToChat('Sorry, I encountered an error while streaming the response.', false);
+    }
+}
+
+// Poll the persisted response from the last shown character until the generation ends.
+// Returns true once it completed or was aborted.
+async function readPersistedResponse(aiMessageId, state) {
+    for (let attempt = 0; attempt < 60; attempt++) {
+        const response = await fetch(
+            `${API_BASE_URL}/chat/messages/${state.messageId}/response?offset=${state.received}`,
+            { headers: { 'Authorization': `Bearer ${authToken}` } }
+        );
+        if (!response.ok) {
+            return false;
+        }
+        const data = await response.json();
+        if (data.text) {
+            state.received = data.offset;
+            appendToAIMessage(aiMessageId, data.text);
+        }
+        if (data.status !== 'streaming') {
+            removeCursor(aiMessageId);
+            return true;
+        }
+        // Still generating in another worker; partial text is flushed every second or so
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+    return false;
+}
+
+// Read an SSE response into the AI message. Returns true once the stream finished.
+async function readSSEStream(response, aiMessageId, state) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
         
-        console.log('Starting to read stream...');
+        if (done) {
+            return false;
+        }
         
-        while (true) {
-            const { done, value } = await reader.read();
-            
-            if (done) {
-                console.log('Stream complete');
-                break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        // Process complete lines immediately
+        const lines = buffer.split('\n');
+        buffer = lines.pop() || ''; // Keep incomplete line in buffer
+        
+        for (const line of lines) {
+            if (line.startsWith('id: ')) {
+                state.lastEventId = parseInt(line.slice(4), 10);
+                continue;
             }
+            if (!line.startsWith('data: ')) continue; // Skip blank lines, comments and retry hints
             
-            // Decode the chunk
-            const chunk = decoder.decode(value, { stream: true });
-            console.log('Received chunk:', chunk);
-            
-            buffer += chunk;
-            
-            // Process complete lines immediately
-            const lines = buffer.split('\n');
-            buffer = lines.pop() || ''; // Keep incomplete line in buffer
-            
-            for (const line of lines) {
-                if (line.trim() === '') continue; // Skip empty lines
+            try {
+                const data = JSON.parse(line.slice(6));
+                state.messageId = data.message_id || state.messageId;
                 
-                if (line.startsWith('data: ')) {
-                    try {
-                        const jsonStr = line.slice(6); // Remove 'data: ' prefix
-                        console.log('Parsing JSON:', jsonStr);
-                        
-                        const data = JSON.parse(jsonStr);
-                        console.log('Parsed data:', data);
-                        
-                        if (data.error) {
-                            console.error('Stream error:', data.error);
-                            updateAIMessage(aiMessageId, `Error: ${data.error}`, true);
-                            return;
-                        }
-                        
-                        if (data.done) {
-                            console.log('Stream done signal received');
-                            // Remove the cursor when done
-                            removeCursor(aiMessageId);
-                            return;
-                        }
-                        
-                        if (data.chunk) {
-                            console.log('Appending chunk:', data.chunk);
-                            // Use setTimeout with 0 delay to ensure immediate rendering
-                            setTimeout(() => {
-                                appendToAIMessage(aiMessageId, data.chunk);
-                            }, 0);
-                        }
-                    } catch (e) {
-                        console.error('Error parsing SSE data:', e, 'Line:', line);
-                    }
+                if (data.error) {
+                    console.error('Stream error:', data.error);
+                    updateAIMessage(aiMessageId, `Error: ${data.error}`, true);
+                    return true;
+                }
+                
+                if (data.aborted) {
+                    // Nobody was connected, so the server stopped generating
+                    removeCursor(aiMessageId);
+                    return true;
                 }
+                
+                if (data.done) {
+                    // Remove the cursor when done
+                    removeCursor(aiMessageId);
+                    return true;
+                }
+                
+                if (data.chunk) {
+                    state.received += [...data.chunk].length;
+                    // Use setTimeout with 0 delay to ensure immediate rendering
+                    setTimeout(() => {
+                        appendToAIMessage(aiMessageId, data.chunk);
+                    }, 0);
+                }
+            } catch (e) {
+                console.error('Error parsing SSE data:', e, 'Line:', line);
             }
         }
-    } catch (error) {
-        console.error('Error in sendMessageStream:', error);
-        hideTypingIndicator();
-        addMessageToChat('Sorry, I encountered an error while streaming the response.', false);
     }
 }
 